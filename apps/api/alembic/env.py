@@ -0,0 +1,67 @@
+"""
+Alembic environment: migrates the application database with the model metadata
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import engine
+from app.models.nft import NFT_SEARCH_COLUMNS, NFT_SEARCH_INDEXES, Base
+import app.models.indexer  # noqa: F401 - register indexer tables
+
+config = context.config
+# The application configures logging itself when it runs migrations
+if config.config_file_name is not None and config.attributes.get("connection") is None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Leave out of autogenerate the objects the models do not declare for this dialect"""
+    if reflected and compare_to is None and name in NFT_SEARCH_COLUMNS + NFT_SEARCH_INDEXES:
+        return False
+    ddl_if = getattr(obj, "_ddl_if", None)
+    if type_ == "index" and not reflected and ddl_if is not None and ddl_if.dialect:
+        return context.get_bind().dialect.name == ddl_if.dialect
+    return True
+
+
+def run_migrations_offline():
+    """Emit the migration SQL instead of running it (alembic upgrade --sql)"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    def run(connection):
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite cannot ALTER most constraints, so changes rebuild the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+    # Reuse the caller's connection and transaction when invoked from the app
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run(connection)
+        return
+    with engine.connect() as connection:
+        run(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,134 @@
+"""initial schema
+
+The schema as create_all() and app/database/migrations.py left it before
+migrations were managed by Alembic. Tables and indexes that already exist
+are skipped, so those databases adopt this revision once their columns have
+been upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:58:16.119296
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# app.models.types.Address stores addresses as their 20 raw bytes
+ADDRESS = sa.LargeBinary(length=20)
+
+
+def _create_table(name, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def _create_index(name, table, columns, **kwargs):
+    if name not in {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}:
+        op.create_index(name, table, columns, **kwargs)
+
+
+def upgrade() -> None:
+    _create_table('nfts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token_id', sa.BigInteger(), nullable=False),
+    sa.Column('owner_address', ADDRESS, nullable=False),
+    sa.Column('token_uri', sa.Text(), nullable=False),
+    sa.Column('metadata', sa.JSON(none_as_null=True).with_variant(postgresql.JSONB(none_as_null=True), 'postgresql'), nullable=True),
+    sa.Column('minted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('transaction_hash', sa.String(length=66), nullable=False),
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_nfts_id', 'nfts', ['id'], unique=False)
+    _create_index('ix_nfts_token_id', 'nfts', ['token_id'], unique=True)
+    _create_index('ix_nfts_owner_address', 'nfts', ['owner_address'], unique=False)
+    _create_index('ix_nfts_transaction_hash', 'nfts', ['transaction_hash'], unique=False)
+    _create_index('ix_nfts_minted_at_token_id', 'nfts', ['minted_at', 'token_id'], unique=False)
+    _create_index('ix_nfts_owner_minted_at_token_id', 'nfts', ['owner_address', 'minted_at', 'token_id'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        _create_index('ix_nfts_metadata', 'nfts', ['metadata'], unique=False,
+                      postgresql_using='gin', postgresql_ops={'metadata': 'jsonb_path_ops'})
+
+    _create_table('nft_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('minted_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+    _create_table('nft_owners',
+    sa.Column('token_id', sa.BigInteger(), nullable=False),
+    sa.Column('owner_address', ADDRESS, nullable=False),
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('log_index', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('token_id')
+    )
+    _create_index('ix_nft_owners_owner_address', 'nft_owners', ['owner_address'], unique=False)
+
+    _create_table('nft_transfers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token_id', sa.BigInteger(), nullable=False),
+    sa.Column('from_address', ADDRESS, nullable=False),
+    sa.Column('to_address', ADDRESS, nullable=False),
+    sa.Column('transaction_hash', sa.String(length=66), nullable=False),
+    sa.Column('block_number', sa.BigInteger(), nullable=False),
+    sa.Column('log_index', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('block_number', 'log_index', name='uq_nft_transfers_block_log')
+    )
+    _create_index('ix_nft_transfers_token_id', 'nft_transfers', ['token_id'], unique=False)
+    _create_index('ix_nft_transfers_from_address', 'nft_transfers', ['from_address'], unique=False)
+    _create_index('ix_nft_transfers_to_address', 'nft_transfers', ['to_address'], unique=False)
+
+    _create_table('indexer_checkpoints',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_block', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+    _create_table('indexer_blocks',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('number', sa.BigInteger(), nullable=False),
+    sa.Column('hash', sa.String(length=66), nullable=False),
+    sa.PrimaryKeyConstraint('name', 'number')
+    )
+
+    _create_table('backfill_shards',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('start_block', sa.BigInteger(), nullable=False),
+    sa.Column('end_block', sa.BigInteger(), nullable=False),
+    sa.Column('done', sa.Boolean(), nullable=False),
+    sa.Column('events', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('name', 'start_block')
+    )
+
+    _create_table('leader_leases',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('holder', sa.String(length=128), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('leader_leases')
+    op.drop_table('backfill_shards')
+    op.drop_table('indexer_blocks')
+    op.drop_table('indexer_checkpoints')
+    op.drop_table('nft_transfers')
+    op.drop_table('nft_owners')
+    op.drop_table('nft_daily_stats')
+    op.drop_table('nfts')
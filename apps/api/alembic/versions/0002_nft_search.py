@@ -0,0 +1,65 @@
+"""nft search
+
+Generated search columns over metadata name, description and attribute
+values, with GIN indexes for full-text (tsvector) and trigram matching. The
+columns are computed by PostgreSQL on every insert and update, so each path
+that writes metadata keeps them current. Other dialects search metadata
+directly and get nothing here.
+
+Adding stored generated columns rewrites nfts once; on a large table run
+this revision during a quiet period.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 16:02:41.512867
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Weighted so that name matches rank above description matches, and those
+# above attribute values. The 'simple' configuration neither stems nor drops
+# stop words, which keeps dates and trait values searchable as written.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(metadata->>'name', '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(metadata->>'description', '')), 'B') || "
+    "setweight(jsonb_to_tsvector('simple'::regconfig, "
+    "coalesce(jsonb_path_query_array(metadata, '$.attributes[*].value'), '[]'::jsonb), "
+    "'[\"string\", \"numeric\"]'::jsonb), 'C')"
+)
+SEARCH_TEXT = (
+    "coalesce(metadata->>'name', '') || ' ' || coalesce(metadata->>'description', '') || ' ' || "
+    "coalesce(jsonb_path_query_array(metadata, '$.attributes[*].value')::text, '')"
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('nfts', sa.Column('search_vector', postgresql.TSVECTOR(),
+                                    sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+    op.add_column('nfts', sa.Column('search_text', sa.Text(),
+                                    sa.Computed(SEARCH_TEXT, persisted=True), nullable=True))
+    op.create_index('ix_nfts_search_vector', 'nfts', ['search_vector'], unique=False,
+                    postgresql_using='gin')
+    op.create_index('ix_nfts_search_text', 'nfts', ['search_text'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_nfts_search_text', table_name='nfts')
+    op.drop_index('ix_nfts_search_vector', table_name='nfts')
+    op.drop_column('nfts', 'search_text')
+    op.drop_column('nfts', 'search_vector')
@@ -0,0 +1,39 @@
+"""mint order indexes
+
+Mint-ordered lists page by (block_number, token_id) instead of
+(minted_at, token_id): minted_at is nullable, and rows with a NULL mint
+time could not be reached through a keyset cursor. The owner index moves
+to the new key; ix_nfts_minted_at_token_id stays for minted_at range
+filters.
+
+Revisions run in one transaction, so the indexes are not built
+CONCURRENTLY and block writes to nfts while they are created.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 19:24:07.318420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_nfts_block_number_token_id', 'nfts', ['block_number', 'token_id'], unique=False)
+    op.create_index('ix_nfts_owner_block_number_token_id', 'nfts',
+                    ['owner_address', 'block_number', 'token_id'], unique=False)
+    op.drop_index('ix_nfts_owner_minted_at_token_id', table_name='nfts')
+
+
+def downgrade() -> None:
+    op.create_index('ix_nfts_owner_minted_at_token_id', 'nfts',
+                    ['owner_address', 'minted_at', 'token_id'], unique=False)
+    op.drop_index('ix_nfts_owner_block_number_token_id', table_name='nfts')
+    op.drop_index('ix_nfts_block_number_token_id', table_name='nfts')
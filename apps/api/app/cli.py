@@ -0,0 +1,159 @@
+"""
+Command-line entry points
+
+    python -m app.cli backfill --workers 8
+    python -m app.cli export --format parquet -o nfts.parquet
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+
+
+def migrate(args):
+    """Upgrade the database schema to the latest migration"""
+    from app.database import engine, prepare_database
+    from app.database.migrations import check_schema, schema_revisions
+
+    if args.check:
+        try:
+            check_schema(engine)
+        except RuntimeError as e:
+            raise SystemExit(str(e))
+    else:
+        prepare_database()
+    current, head = schema_revisions(engine)
+    print(json.dumps({"revision": current, "head": head}))
+
+
+def backfill(args):
+    """Index historical contract events up to where the live listener starts"""
+    from app.database import init_db
+    from app.services.backfill import Backfill
+    from app.services.blockchain import BlockchainService
+
+    asyncio.run(init_db())
+    service = BlockchainService()
+    if not service.contract:
+        raise SystemExit("CONTRACT_ADDRESS is not configured")
+    try:
+        summary = Backfill(
+            service, workers=args.workers, shard_size=args.shard_size, processes=not args.threads
+        ).run(from_block=args.from_block, replan=args.replan)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finally:
+        service.close()
+    print(json.dumps(summary))
+
+
+def block_times(args):
+    """Restamp existing mints with the time of their block"""
+    from app.database import init_db
+    from app.services.block_times import backfill_minted_at
+    from app.services.blockchain import BlockchainService
+
+    asyncio.run(init_db())
+    service = BlockchainService()
+    try:
+        summary = backfill_minted_at(service.block_times, from_block=args.from_block)
+    finally:
+        service.close()
+    print(json.dumps(summary))
+
+
+def reconcile(args):
+    """Compare indexed NFTs with the contract, optionally repairing differences"""
+    from app.database import init_db
+    from app.services.blockchain import BlockchainService
+    from app.services.reconcile import Reconciler
+    from app.services.rpc_batch import RPCCallError
+
+    asyncio.run(init_db())
+    service = BlockchainService()
+    if not service.contract:
+        raise SystemExit("CONTRACT_ADDRESS is not configured")
+    try:
+        reconciler = Reconciler(service, batch_size=args.batch_size)
+        report = reconciler.audit(args.block)
+        result = {"audit": report.summary()}
+        if args.repair and not report.consistent:
+            result["repair"] = reconciler.repair(report)
+            report = reconciler.audit(report.block)
+            result["after_repair"] = report.summary()
+    except (ValueError, RPCCallError) as e:
+        raise SystemExit(str(e))
+    finally:
+        service.close()
+    print(json.dumps(result, indent=2))
+    if not report.consistent:
+        raise SystemExit(1)
+
+
+def export(args):
+    """Write active NFTs as NDJSON, CSV or Parquet"""
+    from app.models.types import normalize_address
+    from app.services.export import export_statement, stream_export
+
+    try:
+        owner = normalize_address(args.owner) if args.owner else None
+        stmt = export_statement(owner, args.from_block, args.to_block, args.minted_after, args.minted_before)
+        chunks = stream_export(args.format, stmt)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+def main(argv=None):
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Eternal Calendar NFT API commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_migrate = commands.add_parser("migrate", help=migrate.__doc__)
+    parser_migrate.add_argument("--check", action="store_true", help="only fail if migrations are pending")
+    parser_migrate.set_defaults(func=migrate)
+
+    parser_backfill = commands.add_parser("backfill", help=backfill.__doc__)
+    parser_backfill.add_argument("--from-block", type=int, help="first block; defaults to the deployment block")
+    parser_backfill.add_argument("--workers", type=int, default=settings.BACKFILL_WORKERS)
+    parser_backfill.add_argument("--shard-size", type=int, default=settings.BACKFILL_SHARD_SIZE)
+    parser_backfill.add_argument("--threads", action="store_true", help="use threads instead of processes")
+    parser_backfill.add_argument("--replan", action="store_true", help="discard saved shard progress and plan again")
+    parser_backfill.set_defaults(func=backfill)
+
+    parser_block_times = commands.add_parser("block-times", help=block_times.__doc__)
+    parser_block_times.add_argument("--from-block", type=int, default=0, help="resume from this block")
+    parser_block_times.set_defaults(func=block_times)
+
+    parser_reconcile = commands.add_parser("reconcile", help=reconcile.__doc__)
+    parser_reconcile.add_argument("--block", type=int, help="audit at this block; defaults to the indexer checkpoint")
+    parser_reconcile.add_argument("--batch-size", type=int, default=settings.RECONCILE_BATCH_SIZE)
+    parser_reconcile.add_argument("--repair", action="store_true", help="write missing tokens, owners and URIs")
+    parser_reconcile.set_defaults(func=reconcile)
+
+    parser_export = commands.add_parser("export", help=export.__doc__)
+    parser_export.add_argument("--format", choices=["ndjson", "csv", "parquet"], default="ndjson")
+    parser_export.add_argument("--output", "-o", help="file to write; defaults to stdout")
+    parser_export.add_argument("--owner", help="only NFTs held by this address")
+    parser_export.add_argument("--from-block", type=int)
+    parser_export.add_argument("--to-block", type=int)
+    parser_export.add_argument("--minted-after", type=datetime.fromisoformat, help="ISO timestamp, inclusive")
+    parser_export.add_argument("--minted-before", type=datetime.fromisoformat, help="ISO timestamp, exclusive")
+    parser_export.set_defaults(func=export)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
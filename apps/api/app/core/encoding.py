@@ -0,0 +1,107 @@
+"""
+Response body encoding: orjson, optional MessagePack and gzip
+"""
+
+import gzip
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+# Streams that must reach the client as they are written, or are compressed already
+_UNCOMPRESSED_TYPES = ("text/event-stream", "application/vnd.apache.parquet")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode a response body as compact JSON.
+
+    Rows can be passed as plain dicts and tuples; datetimes are written in
+    ISO 8601 with a Z suffix for UTC, as the Pydantic models write them.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Whether the client asked for MessagePack and it can be produced here"""
+    accept = request.headers.get("accept", "")
+    if MSGPACK not in accept and "application/x-msgpack" not in accept:
+        return False
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def to_msgpack(body: bytes) -> bytes:
+    """Re-encode a JSON body as MessagePack"""
+    import msgpack
+
+    return msgpack.packb(orjson.loads(body))
+
+
+def compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=settings.RESPONSE_COMPRESS_LEVEL)
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "")
+
+
+def _passes_through(message: Message) -> bool:
+    """Whether a response start must reach the client without gzip"""
+    headers = Headers(raw=message["headers"])
+    return "content-encoding" in headers or headers.get("content-type", "").startswith(_UNCOMPRESSED_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    gzip large responses that were not compressed by the response cache.
+
+    Responses that already carry a Content-Encoding, Server-Sent Events and
+    Parquet exports are passed through: compressing an event stream would
+    hold events back in the compressor's buffer. Everything else goes
+    through starlette's GZipMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.RESPONSE_COMPRESS_MIN_SIZE,
+                 compresslevel: int = settings.RESPONSE_COMPRESS_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        async def routed(scope: Scope, receive: Receive, gzip_send: Send) -> None:
+            # Each response is sent to the client directly or through gzip,
+            # decided by the headers of its http.response.start message
+            target = gzip_send
+
+            async def route(message: Message) -> None:
+                nonlocal target
+                if message["type"] == "http.response.start" and _passes_through(message):
+                    target = send
+                await target(message)
+
+            await self.app(scope, receive, route)
+
+        compressor = GZipMiddleware(routed, minimum_size=self.minimum_size, compresslevel=self.compresslevel)
+        await compressor(scope, receive, send)
@@ -0,0 +1,133 @@
+"""
+HTTP response caching with ETags and a shared response cache
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from app.core.config import settings
+from app.core.encoding import JSON, MSGPACK, accepts_gzip, compress, dumps, to_msgpack, wants_msgpack
+from app.core.metrics import span
+from app.services.cache import get_cache
+
+RESPONSE_PREFIX = "response:"
+LIST_PREFIX = RESPONSE_PREFIX + "list:"
+MSGPACK_SUFFIX = "|msgpack"
+
+
+def nft_key(token_id: int) -> str:
+    return f"{RESPONSE_PREFIX}nft:{token_id}"
+
+
+def nft_metadata_key(token_id: int) -> str:
+    return f"{RESPONSE_PREFIX}nft-metadata:{token_id}"
+
+
+def representation_key(key: str, msgpack: bool) -> str:
+    """Cache key of one representation of a response; MessagePack bodies are stored apart"""
+    return key + MSGPACK_SUFFIX if msgpack else key
+
+
+def representation_keys(key: str) -> Tuple[str, str]:
+    """Every cached representation of a response, for invalidation"""
+    return representation_key(key, False), representation_key(key, True)
+
+
+def list_key(request: Request) -> str:
+    """Key a list response on its path and normalized query string"""
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    return f"{LIST_PREFIX}{request.url.path}?{query}"
+
+
+def cache_entry(content: Any, version: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Serialize a response body for the cache.
+
+    The ETag is derived from version when given (e.g. block number and
+    updated_at of a row), otherwise from the body bytes.
+    """
+    body = dumps(content)
+    digest = hashlib.sha256(version.encode() if version else body).hexdigest()[:32]
+    return {"body": body, "etag": f'"{digest}"', "headers": headers or {}}
+
+
+def _finish_entry(entry: Dict[str, Any], msgpack: bool) -> Dict[str, Any]:
+    """Re-encode a loaded entry for its representation and gzip it once, before caching"""
+    if msgpack:
+        entry["body"] = to_msgpack(entry["body"])
+        entry["etag"] = entry["etag"][:-1] + '-msgpack"'
+    if len(entry["body"]) >= settings.RESPONSE_COMPRESS_MIN_SIZE:
+        entry["gzip"] = compress(entry["body"])
+    return entry
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def cached_response(
+    request: Request,
+    key: str,
+    loader: Callable[[], Optional[Dict[str, Any]]],
+    max_age: int,
+    ttl: float = settings.RESPONSE_CACHE_TTL,
+    not_found: str = "Not found"
+) -> Response:
+    """
+    Serve a JSON response from the response cache, answering If-None-Match with 304.
+
+    loader builds a cache_entry() on a miss, or returns None for a 404;
+    concurrent misses for the same key share one load. Clients sending
+    Accept: application/msgpack get MessagePack, cached under its own key,
+    and large bodies are stored gzipped as well so hits are never
+    compressed again. Each representation is served with its own ETag.
+    """
+    msgpack = wants_msgpack(request)
+
+    def load():
+        # Only misses reach the database; their time shows up as response.load spans
+        with span("response.load", path=request.url.path):
+            entry = loader()
+        return None if entry is None else _finish_entry(entry, msgpack)
+
+    entry = get_cache().get_or_load(representation_key(key, msgpack), ttl, load)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=not_found)
+
+    # gzip and identity bodies differ byte for byte, so each gets its own strong ETag
+    gzipped = "gzip" in entry and accepts_gzip(request)
+    etag = entry["etag"][:-1] + '-gzip"' if gzipped else entry["etag"]
+    headers = dict(entry["headers"])
+    headers["ETag"] = etag
+    headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+    headers["Vary"] = "Accept, Accept-Encoding"
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    media_type = MSGPACK if msgpack else JSON
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=entry["gzip"], media_type=media_type, headers=headers)
+    return Response(content=entry["body"], media_type=media_type, headers=headers)
+
+
+def invalidate_nfts(token_ids: Iterable[int]):
+    """Drop cached responses for tokens whose rows changed"""
+    keys = []
+    for token_id in token_ids:
+        keys.extend(representation_keys(nft_key(token_id)))
+        keys.extend(representation_keys(nft_metadata_key(token_id)))
+    if keys:
+        get_cache().invalidate(*keys)
+
+
+def invalidate_lists():
+    """Drop cached list and stats responses after rows are added or changed"""
+    get_cache().invalidate_prefix(LIST_PREFIX)
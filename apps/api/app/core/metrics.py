@@ -0,0 +1,203 @@
+"""
+Prometheus metrics and timing spans for the API, database, RPC client and indexer
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.timing")
+
+# Seconds; spans milliseconds to the 30 s RPC read timeout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to response headers by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+DB_POOL_CONNECT_DURATION = Histogram(
+    "db_pool_connect_seconds", "Time to open a new database connection for the pool",
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_connections_checked_out", "Database connections currently in use")
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Database statement execution time by statement type",
+    ["statement"], buckets=LATENCY_BUCKETS
+)
+RPC_REQUESTS = Counter("rpc_requests_total", "JSON-RPC requests by method and outcome", ["method", "status"])
+RPC_REQUEST_DURATION = Histogram(
+    "rpc_request_duration_seconds", "JSON-RPC request latency by method",
+    ["method"], buckets=LATENCY_BUCKETS
+)
+INDEXER_HEAD = Gauge("indexer_chain_head_block", "Latest chain head seen by the indexer", ["indexer"])
+INDEXER_CHECKPOINT = Gauge("indexer_checkpoint_block", "Last block committed by the indexer", ["indexer"])
+INDEXER_LAG = Gauge("indexer_head_lag_blocks", "Chain head minus the indexer checkpoint", ["indexer"])
+INDEXER_CHUNK_SIZE = Gauge("indexer_chunk_size_blocks", "Current eth_getLogs window", ["indexer"])
+INDEXER_EVENTS = Counter("indexer_events_total", "Contract events decoded by the indexer", ["indexer", "event"])
+INDEXER_REORGS = Counter("indexer_reorgs_total", "Chain reorganizations rolled back", ["indexer"])
+LEADER = Gauge("leader_elected", "1 while this process holds a background role", ["role"])
+INGEST_ROWS = Counter("ingest_rows_total", "Rows written by the ingest path", ["table"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by key space and result", ["keyspace", "result"])
+STREAM_CLIENTS = Gauge("event_stream_clients", "Connected event stream clients")
+STREAM_DROPPED = Counter("event_stream_dropped_total", "Event stream clients dropped for falling behind")
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Delay of a scheduled event loop wakeup; high values mean blocking calls on the loop",
+    buckets=LATENCY_BUCKETS
+)
+SPAN_DURATION = Histogram(
+    "span_duration_seconds", "Duration of instrumented hot-path operations",
+    ["span"], buckets=LATENCY_BUCKETS
+)
+
+
+def record_span(name: str, elapsed: float, **fields: Any):
+    """
+    Record a timed operation in span_duration_seconds.
+
+    The histogram is the signal; a key=value log line is only formatted for
+    spans slower than SLOW_SPAN_SECONDS, or for every span at DEBUG level.
+    """
+    SPAN_DURATION.labels(name).observe(elapsed)
+    level = logging.INFO if elapsed >= settings.SLOW_SPAN_SECONDS else logging.DEBUG
+    if logger.isEnabledFor(level):
+        details = "".join(f" {key}={value}" for key, value in fields.items())
+        logger.log(level, "span=%s duration_ms=%.1f%s", name, elapsed * 1000, details)
+
+
+@contextmanager
+def span(name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block of code as a span.
+
+    The yielded dict can be filled with result fields (rows written, etc.)
+    that are logged alongside the duration when the span is logged.
+    """
+    started = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record_span(name, time.perf_counter() - started, **fields)
+
+
+def cache_keyspace(key: str) -> str:
+    """Low-cardinality label for a cache key: its first segment, e.g. "response" or "chain" """
+    return key.split(":", 1)[0]
+
+
+def instrument_engine(engine: Engine):
+    """
+    Record connection opening times, connections in use and statement timings for an engine.
+
+    Everything is driven by engine-level events, which SQLAlchemy carries over
+    to the new pool when engine.dispose() replaces it.
+    """
+    @event.listens_for(engine, "do_connect")
+    def _do_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop("connect_started", None)
+        if started is not None:
+            DB_POOL_CONNECT_DURATION.observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_DURATION.labels(kind).observe(time.perf_counter() - started)
+
+
+def rpc_metrics_middleware(make_request: Callable, w3) -> Callable:
+    """web3 middleware counting and timing JSON-RPC requests by method"""
+    def middleware(method, params):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = make_request(method, params)
+            status = "error" if "error" in response else "ok"
+            return response
+        finally:
+            RPC_REQUEST_DURATION.labels(method).observe(time.perf_counter() - started)
+            RPC_REQUESTS.labels(method, status).inc()
+    return middleware
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request to its response headers, labelled by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status: int):
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(scope["method"], path, str(status)).observe(time.perf_counter() - started)
+
+        async def send_wrapper(message):
+            nonlocal recorded
+            # Streaming responses are timed to their first byte, not their whole lifetime
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record(500)
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Measure how late the event loop wakes up; runs until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - scheduled))
+
+
+def render_metrics() -> tuple:
+    """Get the exposition body and content type, merging worker processes in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
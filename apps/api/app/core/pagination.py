@@ -0,0 +1,68 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort-key values of the last row into an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """Decode a cursor back into values typed like the given columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("cursor does not match sort key")
+
+        values = []
+        for column, value in zip(columns, payload):
+            if column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            else:
+                value = column.type.python_type(value)
+            values.append(value)
+        return values
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    query: Query,
+    columns: Sequence[Any],
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """
+    Page a query in descending order of columns.
+
+    With a cursor, rows after it are found by a row-value comparison that an
+    index on the same columns answers directly; skip is the legacy offset
+    fallback. Returns the rows and the cursor for the next page, if any.
+    """
+    if cursor:
+        query = query.filter(tuple_(*columns) < tuple_(*decode_cursor(cursor, columns)))
+
+    query = query.order_by(*(column.desc() for column in columns))
+    if not cursor and skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit).all()
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows, next_cursor
@@ -2,18 +2,22 @@
 Database configuration and initialization
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, Table
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.metrics import instrument_engine
 
-# Create database engine
+# Create database engine; connections are opened on first use
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=300,
     echo=settings.DEBUG
 )
+instrument_engine(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -31,7 +35,32 @@ def get_db():
         db.close()
 
 
-async def init_db():
-    """Initialize database tables"""
-    from app.models.nft import Base
-    Base.metadata.create_all(bind=engine)
+def dialect_insert(db, table: Table):
+    """Get an INSERT for the session's dialect that supports ON CONFLICT"""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+def prepare_database(migrate: bool = True):
+    """
+    Migrate the schema to the latest revision, or only check that it is
+    there when migrate is False, then fill derived tables. Blocking.
+    """
+    from app.database.migrations import check_schema, run_migrations
+    if migrate:
+        run_migrations(engine)
+    else:
+        check_schema(engine)
+    
+    from app.services.stats import ensure_daily_stats
+    db = SessionLocal()
+    try:
+        ensure_daily_stats(db)
+    finally:
+        db.close()
+
+
+async def init_db(migrate: bool = True):
+    """Prepare the database on the blocking executor, keeping the event loop free"""
+    await run_blocking(prepare_database, migrate)
@@ -0,0 +1,157 @@
+"""
+Schema migrations: Alembic revisions, plus in-place upgrades for databases
+created before Alembic managed the schema
+"""
+
+import json
+import os
+from typing import Optional, Tuple
+
+from sqlalchemy import bindparam, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+
+def _column_type(connection: Connection, table: str, column: str) -> str:
+    """Get a column's database type name in lower case, or "" if it does not exist"""
+    for info in inspect(connection).get_columns(table):
+        if info["name"] == column:
+            return str(info["type"]).lower()
+    return ""
+
+
+def clear_invalid_metadata(connection: Connection):
+    """Null out metadata values that are not valid JSON so they can be cast"""
+    if "text" not in _column_type(connection, "nfts", "metadata"):
+        return
+
+    invalid = []
+    rows = connection.execute(text("SELECT id, metadata FROM nfts WHERE metadata IS NOT NULL"))
+    for row_id, value in rows:
+        try:
+            json.loads(value)
+        except (TypeError, ValueError):
+            invalid.append(row_id)
+
+    clear = text("UPDATE nfts SET metadata = NULL WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+    for i in range(0, len(invalid), 1000):
+        connection.execute(clear, {"ids": invalid[i:i + 1000]})
+    if invalid:
+        print(f"Cleared {len(invalid)} invalid metadata values")
+
+
+def metadata_to_jsonb(connection: Connection):
+    """Convert nfts.metadata from TEXT to JSONB on PostgreSQL"""
+    if connection.dialect.name != "postgresql" or _column_type(connection, "nfts", "metadata") != "text":
+        return
+    connection.execute(text(
+        "ALTER TABLE nfts ALTER COLUMN metadata TYPE jsonb "
+        "USING CASE WHEN metadata = '' THEN NULL ELSE metadata::jsonb END"
+    ))
+    print("Converted nfts.metadata to JSONB")
+
+
+def add_nft_updated_at(connection: Connection):
+    """Add nfts.updated_at, starting existing rows at their mint time"""
+    if _column_type(connection, "nfts", "updated_at"):
+        return
+    from app.models.nft import NFT
+
+    column_type = NFT.__table__.c.updated_at.type.compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE nfts ADD COLUMN updated_at {column_type}"))
+    connection.execute(text("UPDATE nfts SET updated_at = minted_at"))
+    print("Added nfts.updated_at")
+
+
+ADDRESS_COLUMNS = [
+    ("nfts", "owner_address"),
+    ("nft_owners", "owner_address"),
+    ("nft_transfers", "from_address"),
+    ("nft_transfers", "to_address"),
+]
+
+
+def addresses_to_binary(connection: Connection):
+    """Store address columns as 20 raw bytes instead of mixed-case hex strings"""
+    from app.models.types import normalize_address
+
+    for table, column in ADDRESS_COLUMNS:
+        if "char" not in _column_type(connection, table, column):
+            continue
+
+        if connection.dialect.name == "postgresql":
+            # Indexes on the column are rebuilt as part of the type change
+            connection.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bytea "
+                f"USING decode(substr(lower({column}), 3), 'hex')"
+            ))
+            print(f"Converted {table}.{column} to bytea")
+            continue
+
+        # SQLite keeps the declared type, so look for text values left to convert.
+        # Text sorts before blobs, so MIN() answers from the column's index.
+        if not isinstance(connection.execute(text(f"SELECT MIN({column}) FROM {table}")).scalar(), str):
+            continue
+        values = connection.execute(
+            text(f"SELECT DISTINCT {column} FROM {table} WHERE typeof({column}) = 'text'")
+        ).scalars().all()
+        connection.execute(
+            text(f"UPDATE {table} SET {column} = :packed WHERE {column} = :value"),
+            [{"value": value, "packed": bytes.fromhex(normalize_address(value)[2:])} for value in values]
+        )
+        print(f"Converted {len(values)} addresses in {table}.{column} to bytes")
+
+
+# In-place upgrades for databases created by create_all() before Alembic
+# managed the schema; they bring existing columns to the 0001 revision
+LEGACY_MIGRATIONS = [
+    clear_invalid_metadata,
+    metadata_to_jsonb,
+    add_nft_updated_at,
+    addresses_to_binary,
+]
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Advisory lock key serializing migrations across processes starting together
+MIGRATION_LOCK_KEY = 0x6d6967726174696f
+
+
+def alembic_config(connection: Optional[Connection] = None):
+    """Alembic configuration for this app, optionally bound to an open connection"""
+    from alembic.config import Config
+
+    config = Config(os.path.join(API_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(API_DIR, "alembic"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def run_migrations(engine: Engine):
+    """Upgrade the schema to the latest Alembic revision in one transaction"""
+    from alembic import command
+
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(select(func.pg_advisory_xact_lock(MIGRATION_LOCK_KEY)))
+        tables = inspect(connection).get_table_names()
+        if "nfts" in tables and "alembic_version" not in tables:
+            for migration in LEGACY_MIGRATIONS:
+                migration(connection)
+        command.upgrade(alembic_config(connection), "head")
+
+
+def schema_revisions(engine: Engine) -> Tuple[Optional[str], Optional[str]]:
+    """The database's current revision and the latest one shipped with the code"""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+    return current, head
+
+
+def check_schema(engine: Engine):
+    """Raise if the database has not been migrated to the latest revision"""
+    current, head = schema_revisions(engine)
+    if current != head:
+        raise RuntimeError(f"Database schema is at revision {current}, expected {head}; run 'python -m app.cli migrate'")
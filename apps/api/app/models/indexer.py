@@ -0,0 +1,59 @@
+"""
+Indexer state models
+"""
+
+from sqlalchemy import Column, String, DateTime, BigInteger, Boolean, Integer
+from sqlalchemy.sql import func
+
+from app.models.nft import Base
+
+
+class IndexerCheckpoint(Base):
+    """Last block fully processed by a named indexer"""
+    __tablename__ = "indexer_checkpoints"
+    
+    name = Column(String(64), primary_key=True)
+    last_block = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<IndexerCheckpoint(name={self.name}, last_block={self.last_block})>"
+
+
+class IndexedBlock(Base):
+    """Hash of a block an indexer has processed, kept to detect reorgs"""
+    __tablename__ = "indexer_blocks"
+    
+    name = Column(String(64), primary_key=True)
+    number = Column(BigInteger, primary_key=True)
+    hash = Column(String(66), nullable=False)
+    
+    def __repr__(self):
+        return f"<IndexedBlock(name={self.name}, number={self.number}, hash={self.hash})>"
+
+
+class BackfillShard(Base):
+    """A block range of a historical backfill and whether it has been written"""
+    __tablename__ = "backfill_shards"
+    
+    name = Column(String(64), primary_key=True)
+    start_block = Column(BigInteger, primary_key=True)
+    end_block = Column(BigInteger, nullable=False)
+    done = Column(Boolean, nullable=False, default=False)
+    events = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<BackfillShard(name={self.name}, blocks={self.start_block}-{self.end_block}, done={self.done})>"
+
+
+class LeaderLease(Base):
+    """Time-limited claim on a background role, for databases without advisory locks"""
+    __tablename__ = "leader_leases"
+    
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(128), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    
+    def __repr__(self):
+        return f"<LeaderLease(name={self.name}, holder={self.holder}, expires_at={self.expires_at})>"
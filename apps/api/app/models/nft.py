@@ -2,12 +2,15 @@
 NFT data models
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Boolean, BigInteger, Index, JSON, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, AliasChoices
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from app.core.config import settings
+from app.models.types import Address
 
 Base = declarative_base()
 
@@ -18,18 +21,89 @@ class NFT(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     token_id = Column(BigInteger, unique=True, index=True, nullable=False)
-    owner_address = Column(String(42), nullable=False, index=True)
+    owner_address = Column(Address, nullable=False, index=True)
     token_uri = Column(Text, nullable=False)
-    metadata = Column(Text)  # JSON string
+    # "metadata" is reserved by the declarative API, so map the column under another name
+    metadata_ = Column("metadata", JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"))
     minted_at = Column(DateTime(timezone=True), server_default=func.now())
     transaction_hash = Column(String(66), nullable=False, index=True)
     block_number = Column(BigInteger, nullable=False)
     is_active = Column(Boolean, default=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Keyset pagination sort keys (NFT_MINT_ORDER)
+        Index("ix_nfts_block_number_token_id", "block_number", "token_id"),
+        Index("ix_nfts_owner_block_number_token_id", "owner_address", "block_number", "token_id"),
+        # minted_at range filters (recent events, exports)
+        Index("ix_nfts_minted_at_token_id", "minted_at", "token_id"),
+        # Containment (@>) lookups on attributes, e.g. {"attributes": [{"trait_type": "Date"}]}
+        Index(
+            "ix_nfts_metadata",
+            "metadata",
+            postgresql_using="gin",
+            postgresql_ops={"metadata": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
     
     def __repr__(self):
         return f"<NFT(token_id={self.token_id}, owner={self.owner_address})>"
 
 
+# Generated search columns and their indexes, added on PostgreSQL by migration
+# 0002. They are left unmapped so the model stays portable; search queries
+# reach them by name (app/services/search.py).
+NFT_SEARCH_COLUMNS = ("search_vector", "search_text")
+NFT_SEARCH_INDEXES = ("ix_nfts_search_vector", "ix_nfts_search_text")
+
+
+class NFTDailyStat(Base):
+    """Per-day mint counts, maintained incrementally by the ingest path"""
+    __tablename__ = "nft_daily_stats"
+    
+    day = Column(Date, primary_key=True)  # UTC calendar day of minted_at
+    minted_count = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<NFTDailyStat(day={self.day}, minted_count={self.minted_count})>"
+
+
+class NFTOwner(Base):
+    """Current owner of each token, maintained from Transfer events"""
+    __tablename__ = "nft_owners"
+    
+    token_id = Column(BigInteger, primary_key=True)
+    owner_address = Column(Address, nullable=False, index=True)
+    # Position of the transfer that set this owner; older transfers never overwrite it
+    block_number = Column(BigInteger, nullable=False)
+    log_index = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<NFTOwner(token_id={self.token_id}, owner={self.owner_address})>"
+
+
+class NFTTransfer(Base):
+    """Append-only history of Transfer events"""
+    __tablename__ = "nft_transfers"
+    
+    id = Column(Integer, primary_key=True)
+    token_id = Column(BigInteger, nullable=False, index=True)
+    from_address = Column(Address, nullable=False, index=True)
+    to_address = Column(Address, nullable=False, index=True)
+    transaction_hash = Column(String(66), nullable=False)
+    block_number = Column(BigInteger, nullable=False)
+    log_index = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        # A log is identified by its position in the chain, so replays are no-ops
+        UniqueConstraint("block_number", "log_index", name="uq_nft_transfers_block_log"),
+    )
+    
+    def __repr__(self):
+        return f"<NFTTransfer(token_id={self.token_id}, from={self.from_address}, to={self.to_address})>"
+
+
 class NFTCreate(BaseModel):
     """NFT creation request model"""
     token_id: int
@@ -38,6 +112,17 @@ class NFTCreate(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     transaction_hash: str
     block_number: int
+    minted_at: Optional[datetime] = None  # block time; ingest time if unknown
+
+
+class TransferCreate(BaseModel):
+    """Transfer event record"""
+    token_id: int
+    from_address: str
+    to_address: str
+    transaction_hash: str
+    block_number: int
+    log_index: int
 
 
 class NFTResponse(BaseModel):
@@ -46,7 +131,9 @@ class NFTResponse(BaseModel):
     token_id: int
     owner_address: str
     token_uri: str
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = Field(
+        None, validation_alias=AliasChoices("metadata_", "metadata")
+    )
     minted_at: datetime
     transaction_hash: str
     block_number: int
@@ -56,6 +143,50 @@ class NFTResponse(BaseModel):
         from_attributes = True
 
 
+# NFTResponse fields as columns, in field order, for endpoints that select
+# rows as tuples and encode them without building a model per row
+NFT_RESPONSE_COLUMNS = (
+    NFT.id, NFT.token_id, NFT.owner_address, NFT.token_uri, NFT.metadata_,
+    NFT.minted_at, NFT.transaction_hash, NFT.block_number, NFT.is_active
+)
+_NFT_RESPONSE_FIELDS = tuple(NFTResponse.model_fields)
+
+# Newest-first sort key of mint-ordered lists. minted_at is nullable and a
+# NULL never compares in a cursor's row-value comparison, so lists page by
+# the mint's block instead; token IDs break ties within a block.
+NFT_MINT_ORDER = (NFT.block_number, NFT.token_id)
+
+
+def nft_response_dict(row) -> Dict[str, Any]:
+    """NFTResponse body of a row selected with NFT_RESPONSE_COLUMNS first; extra columns are ignored"""
+    return dict(zip(_NFT_RESPONSE_FIELDS, row))
+
+
+class NFTBatchRequest(BaseModel):
+    """Token IDs to look up in one request"""
+    token_ids: List[int] = Field(..., min_length=1, max_length=settings.BATCH_LOOKUP_MAX)
+
+
+class NFTBatchItem(BaseModel):
+    """One looked-up token; nft is None when it does not exist"""
+    token_id: int
+    found: bool
+    nft: Optional[NFTResponse] = None
+
+
+class OwnerBatchRequest(BaseModel):
+    """Owner addresses to look up in one request"""
+    addresses: List[str] = Field(..., min_length=1, max_length=settings.BATCH_LOOKUP_MAX)
+    limit: int = Field(100, ge=1, le=1000, description="Newest NFTs returned per owner")
+
+
+class OwnerBatchItem(BaseModel):
+    """NFTs held by one looked-up address, newest first"""
+    owner_address: str
+    found: bool
+    nfts: List[NFTResponse] = []
+
+
 class NFTMetadata(BaseModel):
     """NFT metadata model"""
     name: str
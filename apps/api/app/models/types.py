@@ -0,0 +1,49 @@
+"""
+Column types shared by the models
+"""
+
+import re
+from typing import Union
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+_HEX_ADDRESS = re.compile(r"^(?:0x)?([0-9a-f]{40})$")
+
+
+def normalize_address(value: Union[str, bytes]) -> str:
+    """Get the canonical lowercase 0x-hex form of an address; raises ValueError if malformed"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        if len(value) != 20:
+            raise ValueError(f"Address must be 20 bytes, got {len(value)}")
+        return "0x" + value.hex()
+
+    match = _HEX_ADDRESS.match(value.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid address {value!r}")
+    return "0x" + match.group(1)
+
+
+class Address(TypeDecorator):
+    """
+    EVM address stored as its 20 raw bytes.
+
+    Any spelling (checksummed, lowercase, without 0x) binds to the same bytes,
+    so equality against an index never needs case folding, and the index is
+    half the size of one on 42-character strings. Values read back are
+    canonical lowercase hex.
+    """
+
+    impl = LargeBinary(20)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return bytes.fromhex(normalize_address(value)[2:])
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return "0x" + bytes(value).hex()
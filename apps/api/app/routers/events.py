@@ -2,118 +2,179 @@
 Event endpoints for blockchain events
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from app.core.config import settings
+from app.core.http_cache import cache_entry, cached_response, list_key
+from app.core.pagination import paginate
 from app.database import get_db
-from app.models.nft import NFT, NFTResponse
-from app.services.blockchain import BlockchainService
-import json
+from app.models.nft import NFT, NFT_MINT_ORDER, NFT_RESPONSE_COLUMNS, NFTDailyStat, nft_response_dict
+from app.services.event_stream import EventHub, get_event_hub
 
 router = APIRouter()
 
 
+def _cached_list(request: Request, load):
+    """Serve a list or stats response through the shared response cache"""
+    return cached_response(
+        request, list_key(request), load,
+        max_age=settings.HTTP_CACHE_LIST_MAX_AGE, ttl=settings.RESPONSE_CACHE_LIST_TTL
+    )
+
+
 @router.get("/minted")
-async def get_minted_events(
+def get_minted_events(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides skip"),
     db: Session = Depends(get_db)
 ):
     """Get recent NFT minting events"""
-    nfts = db.query(NFT).filter(
-        NFT.is_active == True
-    ).order_by(NFT.minted_at.desc()).offset(skip).limit(limit).all()
-    
-    # Parse metadata JSON strings
-    for nft in nfts:
-        if nft.metadata:
-            try:
-                nft.metadata = json.loads(nft.metadata)
-            except:
-                nft.metadata = None
+    def load():
+        query = db.query(*NFT_RESPONSE_COLUMNS).filter(NFT.is_active == True)
+        nfts, next_cursor = paginate(query, NFT_MINT_ORDER, limit, skip, cursor)
+        
+        return cache_entry({
+            "events": [nft_response_dict(nft) for nft in nfts],
+            "total": len(nfts),
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": next_cursor
+        })
     
-    return {
-        "events": nfts,
-        "total": len(nfts),
-        "skip": skip,
-        "limit": limit
-    }
+    return _cached_list(request, load)
 
 
 @router.get("/recent")
-async def get_recent_events(
+def get_recent_events(
+    request: Request,
     hours: int = Query(24, ge=1, le=168),  # Last 24 hours by default, max 1 week
     db: Session = Depends(get_db)
 ):
     """Get events from the last N hours"""
     from datetime import datetime, timedelta
     
-    cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-    
-    nfts = db.query(NFT).filter(
-        NFT.is_active == True,
-        NFT.minted_at >= cutoff_time
-    ).order_by(NFT.minted_at.desc()).all()
-    
-    # Parse metadata JSON strings
-    for nft in nfts:
-        if nft.metadata:
-            try:
-                nft.metadata = json.loads(nft.metadata)
-            except:
-                nft.metadata = None
+    def load():
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        
+        nfts = db.query(*NFT_RESPONSE_COLUMNS).filter(
+            NFT.is_active == True,
+            NFT.minted_at >= cutoff_time
+        ).order_by(NFT.minted_at.desc(), NFT.token_id.desc()).all()
+        
+        return cache_entry({
+            "events": [nft_response_dict(nft) for nft in nfts],
+            "total": len(nfts),
+            "time_range_hours": hours,
+            "cutoff_time": cutoff_time.isoformat()
+        })
     
-    return {
-        "events": nfts,
-        "total": len(nfts),
-        "time_range_hours": hours,
-        "cutoff_time": cutoff_time.isoformat()
-    }
+    return _cached_list(request, load)
 
 
 @router.get("/stats")
-async def get_event_stats(db: Session = Depends(get_db)):
-    """Get event statistics"""
-    from datetime import datetime, timedelta
+def get_event_stats(request: Request, db: Session = Depends(get_db)):
+    """Get event statistics from the daily rollup"""
+    from datetime import datetime, timedelta, timezone
     from sqlalchemy import func
     
-    # Total events
-    total_events = db.query(NFT).filter(NFT.is_active == True).count()
-    
-    # Events in last 24 hours
-    last_24h = datetime.utcnow() - timedelta(hours=24)
-    events_24h = db.query(NFT).filter(
-        NFT.is_active == True,
-        NFT.minted_at >= last_24h
-    ).count()
-    
-    # Events in last week
-    last_week = datetime.utcnow() - timedelta(days=7)
-    events_week = db.query(NFT).filter(
-        NFT.is_active == True,
-        NFT.minted_at >= last_week
-    ).count()
-    
-    # Events by day (last 7 days)
-    daily_events = []
-    for i in range(7):
-        day_start = datetime.utcnow() - timedelta(days=i+1)
-        day_end = datetime.utcnow() - timedelta(days=i)
+    def load():
+        now = datetime.now(timezone.utc)
+        today = now.date()
+        
+        # One pass over the rollup: O(days), independent of the number of NFTs
+        daily_counts = dict(db.query(NFTDailyStat.day, NFTDailyStat.minted_count).all())
+        total_events = sum(daily_counts.values())
         
-        count = db.query(NFT).filter(
+        # Calendar days, today first
+        daily_events = []
+        for i in range(7):
+            day = today - timedelta(days=i)
+            daily_events.append({
+                "date": day.isoformat(),
+                "count": daily_counts.get(day, 0)
+            })
+        events_week = sum(day["count"] for day in daily_events)
+        
+        # Rolling window over the minted_at index
+        events_24h = db.query(func.count(NFT.id)).filter(
             NFT.is_active == True,
-            NFT.minted_at >= day_start,
-            NFT.minted_at < day_end
-        ).count()
+            NFT.minted_at >= now - timedelta(hours=24)
+        ).scalar()
         
-        daily_events.append({
-            "date": day_start.strftime("%Y-%m-%d"),
-            "count": count
+        return cache_entry({
+            "total_events": total_events,
+            "events_24h": events_24h,
+            "events_week": events_week,
+            "daily_events": daily_events
         })
     
-    return {
-        "total_events": total_events,
-        "events_24h": events_24h,
-        "events_week": events_week,
-        "daily_events": daily_events
-    }
+    return _cached_list(request, load)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Resume after this event; the Last-Event-ID header takes precedence"),
+    hub: EventHub = Depends(get_event_hub)
+):
+    """Stream new mints as Server-Sent Events"""
+    subscriber, backlog = hub.subscribe(request.headers.get("last-event-id") or last_event_id)
+    
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield event.sse
+            while True:
+                try:
+                    event = await subscriber.next(settings.STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    # Dropped for falling behind, or shutting down; the client reconnects and resumes
+                    break
+                yield event.sse
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/stream/ws")
+async def stream_events_ws(
+    websocket: WebSocket,
+    last_event_id: Optional[str] = None,
+    hub: EventHub = Depends(get_event_hub)
+):
+    """Stream new mints over a WebSocket as JSON messages"""
+    await websocket.accept()
+    subscriber, backlog = hub.subscribe(last_event_id)
+    try:
+        for event in backlog:
+            await websocket.send_text(event.json)
+        while True:
+            try:
+                event = await subscriber.next(settings.STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_text('{"event":"keepalive"}')
+                continue
+            if event is None:
+                # 1013: try again later
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text(event.json)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.unsubscribe(subscriber)
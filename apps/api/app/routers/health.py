@@ -2,10 +2,11 @@
 Health check endpoints
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.services.blockchain import BlockchainService
+from app.services.blockchain import BlockchainService, get_blockchain_service
 
 router = APIRouter()
 
@@ -20,15 +21,45 @@ async def health_check():
     }
 
 
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop responds; touches nothing external"""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+def readiness(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Readiness probe: startup has finished and the database answers; 503 until then"""
+    state = request.app.state
+    database = "healthy"
+    try:
+        db.execute(text("SELECT 1"))
+    except Exception as e:
+        database = f"unhealthy: {str(e)}"
+    
+    ready = state.ready and database == "healthy"
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "starting" if not state.ready else "unhealthy",
+        "database": database,
+        # Built in the background after the database; RPC-backed endpoints create it on demand
+        "rpc_client": "ready" if state.blockchain_service else "pending",
+        "startup_error": state.startup_error,
+    }
+
+
 @router.get("/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)):
+def detailed_health_check(
+    db: Session = Depends(get_db),
+    blockchain_service: BlockchainService = Depends(get_blockchain_service)
+):
     """Detailed health check including database and blockchain"""
-    blockchain_service = BlockchainService()
     
     # Check database connection
     db_status = "healthy"
     try:
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
     
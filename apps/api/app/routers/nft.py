@@ -2,92 +2,280 @@
 NFT endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from collections import defaultdict
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, text, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from app.core.config import settings
+from app.core.encoding import JSON, dumps
+from app.core.http_cache import (
+    cache_entry, cached_response, invalidate_lists, invalidate_nfts,
+    list_key, nft_key, nft_metadata_key
+)
+from app.core.pagination import paginate
 from app.database import get_db
-from app.models.nft import NFT, NFTResponse, MintRequest, MintResponse
-from app.services.blockchain import BlockchainService
-import json
+from app.models.types import normalize_address
+from app.models.nft import (
+    NFT, NFT_MINT_ORDER, NFT_RESPONSE_COLUMNS, NFTResponse, NFTBatchRequest, NFTBatchItem, OwnerBatchRequest, OwnerBatchItem,
+    MintRequest, MintResponse, nft_response_dict
+)
+from app.services.blockchain import BlockchainService, get_blockchain_service
+from app.services.cache import get_cache
+from app.services.export import EXPORT_FORMATS, export_statement, stream_export
+from app.services.search import search_filter
 
 router = APIRouter()
 
 
+def _attribute_filter(db: Session, trait_type: str, trait_value: Optional[str]):
+    """Match NFTs whose metadata attributes contain the given trait"""
+    if db.get_bind().dialect.name == "postgresql":
+        attribute = {"trait_type": trait_type}
+        if trait_value is not None:
+            attribute["value"] = trait_value
+        # JSONB containment is answered by the GIN index on metadata
+        return type_coerce(NFT.metadata_, JSONB).contains({"attributes": [attribute]})
+    
+    return text(
+        "EXISTS (SELECT 1 FROM json_each(nfts.metadata, '$.attributes') AS attribute "
+        "WHERE json_extract(attribute.value, '$.trait_type') = :trait_type "
+        "AND (:trait_value IS NULL OR json_extract(attribute.value, '$.value') = :trait_value))"
+    ).bindparams(trait_type=trait_type, trait_value=trait_value)
+
+
+def _address(value: str) -> str:
+    """Canonical form of an address parameter; 400 if it is malformed"""
+    try:
+        return normalize_address(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid address")
+
+
+def _nft_version(nft) -> str:
+    """ETag basis for a single NFT: changes whenever its row is rewritten"""
+    updated_at = nft.updated_at or nft.minted_at
+    return f"{nft.token_id}:{nft.block_number}:{updated_at.isoformat() if updated_at else ''}"
+
+
+def _list_entry(rows: list, next_cursor: Optional[str]):
+    """Cache entry for a page of NFT_RESPONSE_COLUMNS rows, carrying the next-page cursor header"""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return cache_entry([nft_response_dict(row) for row in rows], headers=headers)
+
+
 @router.get("/", response_model=List[NFTResponse])
-async def get_nfts(
+def get_nfts(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides skip"),
     owner_address: Optional[str] = Query(None),
+    trait_type: Optional[str] = Query(None, description="Only NFTs with this metadata attribute"),
+    trait_value: Optional[str] = Query(None, description="Attribute value; requires trait_type"),
     db: Session = Depends(get_db)
 ):
-    """Get list of NFTs with optional filtering"""
-    query = db.query(NFT).filter(NFT.is_active == True)
+    """Get list of NFTs with optional filtering, newest first"""
+    if owner_address:
+        owner_address = _address(owner_address)
+    
+    def load():
+        query = db.query(*NFT_RESPONSE_COLUMNS).filter(NFT.is_active == True)
+        
+        if owner_address:
+            query = query.filter(NFT.owner_address == owner_address)
+        
+        if trait_type:
+            query = query.filter(_attribute_filter(db, trait_type, trait_value))
+        
+        nfts, next_cursor = paginate(query, NFT_MINT_ORDER, limit, skip, cursor)
+        return _list_entry(nfts, next_cursor)
     
+    return cached_response(
+        request, list_key(request), load,
+        max_age=settings.HTTP_CACHE_LIST_MAX_AGE, ttl=settings.RESPONSE_CACHE_LIST_TTL
+    )
+
+
+@router.get("/search", response_model=List[NFTResponse])
+def search_nfts(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200, description="Words or \"phrases\" to find in metadata"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    owner_address: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Search metadata names, descriptions and attribute values, most relevant first"""
     if owner_address:
-        query = query.filter(NFT.owner_address == owner_address)
+        owner_address = _address(owner_address)
     
-    nfts = query.offset(skip).limit(limit).all()
+    def load():
+        match, rank = search_filter(db, q)
+        query = db.query(*NFT_RESPONSE_COLUMNS, rank).filter(NFT.is_active == True, match)
+        
+        if owner_address:
+            query = query.filter(NFT.owner_address == owner_address)
+        
+        nfts, next_cursor = paginate(query, [rank, NFT.token_id], limit, cursor=cursor)
+        return _list_entry(nfts, next_cursor)
     
-    # Parse metadata JSON strings
-    for nft in nfts:
-        if nft.metadata:
-            try:
-                nft.metadata = json.loads(nft.metadata)
-            except:
-                nft.metadata = None
+    return cached_response(
+        request, list_key(request), load,
+        max_age=settings.HTTP_CACHE_LIST_MAX_AGE, ttl=settings.RESPONSE_CACHE_LIST_TTL
+    )
+
+
+@router.get("/export")
+def export_nfts(
+    format: str = Query("ndjson", pattern="^(" + "|".join(EXPORT_FORMATS) + ")$"),
+    owner_address: Optional[str] = Query(None),
+    from_block: Optional[int] = Query(None, ge=0),
+    to_block: Optional[int] = Query(None, ge=0),
+    minted_after: Optional[datetime] = Query(None),
+    minted_before: Optional[datetime] = Query(None)
+):
+    """Stream all active NFTs matching the filters as NDJSON, CSV or Parquet, in token order"""
+    if owner_address:
+        owner_address = _address(owner_address)
+    stmt = export_statement(owner_address, from_block, to_block, minted_after, minted_before)
+    try:
+        chunks = stream_export(format, stmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return nfts
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="nfts.{format}"'}
+    )
 
 
 @router.get("/{token_id}", response_model=NFTResponse)
-async def get_nft(token_id: int, db: Session = Depends(get_db)):
+def get_nft(token_id: int, request: Request, db: Session = Depends(get_db)):
     """Get specific NFT by token ID"""
-    nft = db.query(NFT).filter(
-        NFT.token_id == token_id,
-        NFT.is_active == True
-    ).first()
+    def load():
+        nft = db.query(*NFT_RESPONSE_COLUMNS, NFT.updated_at).filter(
+            NFT.token_id == token_id,
+            NFT.is_active == True
+        ).first()
+        
+        if not nft:
+            return None
+        
+        return cache_entry(nft_response_dict(nft), version=_nft_version(nft))
     
-    if not nft:
-        raise HTTPException(status_code=404, detail="NFT not found")
+    return cached_response(
+        request, nft_key(token_id), load,
+        max_age=settings.HTTP_CACHE_MAX_AGE, not_found="NFT not found"
+    )
+
+
+@router.post("/batch", response_model=List[NFTBatchItem])
+def get_nfts_batch(body: NFTBatchRequest, db: Session = Depends(get_db)):
+    """
+    Look up many NFTs in one round trip, in input order.
+    
+    Tokens already in the single-NFT response cache are served from it; the
+    rest are read with one IN query and written back to that cache.
+    """
+    token_ids = list(dict.fromkeys(body.token_ids))
+    cache = get_cache()
+    cached = cache.get_many([nft_key(token_id) for token_id in token_ids])
+    found = {
+        token_id: json.loads(cached[nft_key(token_id)]["body"])
+        for token_id in token_ids if nft_key(token_id) in cached
+    }
+    
+    missing = [token_id for token_id in token_ids if token_id not in found]
+    if missing:
+        entries = {}
+        for nft in db.query(*NFT_RESPONSE_COLUMNS, NFT.updated_at).filter(NFT.token_id.in_(missing), NFT.is_active == True):
+            found[nft.token_id] = nft_response_dict(nft)
+            entries[nft_key(nft.token_id)] = cache_entry(found[nft.token_id], version=_nft_version(nft))
+        cache.set_many(entries, settings.RESPONSE_CACHE_TTL)
     
-    # Parse metadata JSON string
-    if nft.metadata:
+    # Shaped like NFTBatchItem; encoded directly rather than validated again
+    return Response(dumps([
+        {"token_id": token_id, "found": token_id in found, "nft": found.get(token_id)}
+        for token_id in body.token_ids
+    ]), media_type=JSON)
+
+
+@router.post("/owners/batch", response_model=List[OwnerBatchItem])
+def get_nfts_by_owners(body: OwnerBatchRequest, db: Session = Depends(get_db)):
+    """Look up the newest NFTs of many owners with one query, in input order"""
+    canonical = {}
+    for address in body.addresses:
         try:
-            nft.metadata = json.loads(nft.metadata)
-        except:
-            nft.metadata = None
+            canonical[address] = normalize_address(address)
+        except ValueError:
+            pass  # reported as not found
+    addresses = list(dict.fromkeys(canonical.values()))
+    rank = func.row_number().over(
+        partition_by=NFT.owner_address, order_by=[column.desc() for column in NFT_MINT_ORDER]
+    ).label("rank")
+    ranked = db.query(NFT.id, rank).filter(
+        NFT.owner_address.in_(addresses),
+        NFT.is_active == True
+    ).subquery()
+    
+    nfts = db.query(*NFT_RESPONSE_COLUMNS).join(ranked, NFT.id == ranked.c.id).filter(
+        ranked.c.rank <= body.limit
+    ).order_by(ranked.c.rank)
+    
+    by_owner = defaultdict(list)
+    for nft in nfts:
+        by_owner[nft.owner_address].append(nft_response_dict(nft))
     
-    return nft
+    # Shaped like OwnerBatchItem; encoded directly rather than validated again
+    return Response(dumps([
+        {
+            "owner_address": address,
+            "found": canonical.get(address) in by_owner,
+            "nfts": by_owner.get(canonical.get(address), [])
+        }
+        for address in body.addresses
+    ]), media_type=JSON)
 
 
 @router.get("/owner/{owner_address}", response_model=List[NFTResponse])
-async def get_nfts_by_owner(
+def get_nfts_by_owner(
     owner_address: str,
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides skip"),
     db: Session = Depends(get_db)
 ):
-    """Get NFTs owned by specific address"""
-    nfts = db.query(NFT).filter(
-        NFT.owner_address == owner_address,
-        NFT.is_active == True
-    ).offset(skip).limit(limit).all()
+    """Get NFTs owned by specific address, newest first"""
+    owner_address = _address(owner_address)
     
-    # Parse metadata JSON strings
-    for nft in nfts:
-        if nft.metadata:
-            try:
-                nft.metadata = json.loads(nft.metadata)
-            except:
-                nft.metadata = None
+    def load():
+        query = db.query(*NFT_RESPONSE_COLUMNS).filter(
+            NFT.owner_address == owner_address,
+            NFT.is_active == True
+        )
+        
+        nfts, next_cursor = paginate(query, NFT_MINT_ORDER, limit, skip, cursor)
+        return _list_entry(nfts, next_cursor)
     
-    return nfts
+    return cached_response(
+        request, list_key(request), load,
+        max_age=settings.HTTP_CACHE_LIST_MAX_AGE, ttl=settings.RESPONSE_CACHE_LIST_TTL
+    )
 
 
 @router.get("/stats/overview")
-async def get_nft_stats(db: Session = Depends(get_db)):
+def get_nft_stats(
+    db: Session = Depends(get_db),
+    blockchain_service: BlockchainService = Depends(get_blockchain_service)
+):
     """Get NFT statistics"""
-    blockchain_service = BlockchainService()
     
     # Database stats
     total_nfts = db.query(NFT).filter(NFT.is_active == True).count()
@@ -108,7 +296,7 @@ async def get_nft_stats(db: Session = Depends(get_db)):
 
 
 @router.post("/metadata/{token_id}")
-async def update_nft_metadata(
+def update_nft_metadata(
     token_id: int,
     metadata: dict,
     db: Session = Depends(get_db)
@@ -119,34 +307,36 @@ async def update_nft_metadata(
     if not nft:
         raise HTTPException(status_code=404, detail="NFT not found")
     
-    nft.metadata = json.dumps(metadata)
+    nft.metadata_ = metadata
     db.commit()
     
+    invalidate_nfts([token_id])
+    invalidate_lists()
+    
     return {"message": "Metadata updated successfully"}
 
 
 @router.get("/metadata/{token_id}")
-async def get_nft_metadata(token_id: int, db: Session = Depends(get_db)):
+def get_nft_metadata(token_id: int, request: Request, db: Session = Depends(get_db)):
     """Get NFT metadata"""
-    nft = db.query(NFT).filter(
-        NFT.token_id == token_id,
-        NFT.is_active == True
-    ).first()
-    
-    if not nft:
-        raise HTTPException(status_code=404, detail="NFT not found")
-    
-    metadata = None
-    if nft.metadata:
-        try:
-            metadata = json.loads(nft.metadata)
-        except:
-            metadata = {"error": "Invalid metadata format"}
+    def load():
+        nft = db.query(NFT).filter(
+            NFT.token_id == token_id,
+            NFT.is_active == True
+        ).first()
+        
+        if not nft:
+            return None
+        
+        return cache_entry({
+            "token_id": token_id,
+            "token_uri": nft.token_uri,
+            "metadata": nft.metadata_,
+            "owner_address": nft.owner_address,
+            "minted_at": nft.minted_at
+        }, version=_nft_version(nft))
     
-    return {
-        "token_id": token_id,
-        "token_uri": nft.token_uri,
-        "metadata": metadata,
-        "owner_address": nft.owner_address,
-        "minted_at": nft.minted_at
-    }
+    return cached_response(
+        request, nft_metadata_key(token_id), load,
+        max_age=settings.HTTP_CACHE_MAX_AGE, not_found="NFT not found"
+    )
@@ -0,0 +1,166 @@
+"""
+Parallel historical backfill of contract events
+"""
+
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.core.http_cache import invalidate_lists
+from app.database import SessionLocal
+from app.models.indexer import BackfillShard
+from app.services.indexer import BlockIndexer
+
+# Indexer of the current pool worker, used only to fetch and decode logs
+_worker_indexer: Optional[BlockIndexer] = None
+
+
+def resolve_deploy_block(w3, path: str = settings.DEPLOYMENT_INFO_PATH) -> Optional[int]:
+    """Get the contract's deployment block from deployment-info.json, via its receipt if needed"""
+    try:
+        with open(path) as handle:
+            info = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if info.get("blockNumber") is not None:
+        return int(info["blockNumber"])
+    if not info.get("transactionHash"):
+        return None
+    return w3.eth.get_transaction_receipt(info["transactionHash"])["blockNumber"]
+
+
+def _init_worker():
+    global _worker_indexer
+    from app.services.blockchain import BlockchainService
+
+    _worker_indexer = BlockchainService().create_indexer()
+
+
+def fetch_shard(start_block: int, end_block: int) -> List:
+    """Fetch and decode one shard's events in a pool worker"""
+    return _worker_indexer.fetch_range(start_block, end_block)
+
+
+class Backfill:
+    """
+    Index [deploy block, hand-off block] in shards fetched by a worker pool.
+
+    Shards are decoded in parallel but written by this process alone, in
+    block order, each in one transaction with its progress row, so an
+    interrupted backfill resumes with the first unfinished shard. The hand-off
+    block is the live indexer's checkpoint; on a fresh database it is set to
+    the current confirmed head, so the listener carries on from there.
+    """
+
+    def __init__(
+        self,
+        service,
+        workers: int = settings.BACKFILL_WORKERS,
+        shard_size: int = settings.BACKFILL_SHARD_SIZE,
+        processes: bool = True
+    ):
+        self.service = service
+        self.indexer = service.create_indexer()
+        self.name = self.indexer.name
+        self.workers = max(1, workers)
+        self.shard_size = max(1, shard_size)
+        self.processes = processes
+
+    def plan(self, from_block: Optional[int] = None, replan: bool = False) -> List[Tuple[int, int]]:
+        """Get the unfinished shards, creating them on the first run"""
+        db = SessionLocal()
+        try:
+            if replan:
+                db.execute(delete(BackfillShard).where(BackfillShard.name == self.name))
+            shards = db.execute(
+                select(BackfillShard).where(BackfillShard.name == self.name).order_by(BackfillShard.start_block)
+            ).scalars().all()
+            if shards:
+                db.commit()
+                return [(shard.start_block, shard.end_block) for shard in shards if not shard.done]
+
+            if from_block is None:
+                from_block = resolve_deploy_block(self.service.w3)
+            if from_block is None:
+                raise ValueError("Deployment block unknown; pass a start block explicitly")
+
+            hand_off = self.indexer.load_checkpoint()
+            if hand_off is None:
+                hand_off = self.service.w3.eth.block_number - self.indexer.confirmations
+                self.indexer.save_checkpoint(db, hand_off)
+                self.indexer.save_block_hashes(db, {hand_off: self.indexer._block_hash(hand_off)})
+
+            ranges = [
+                (start, min(start + self.shard_size - 1, hand_off))
+                for start in range(from_block, hand_off + 1, self.shard_size)
+            ]
+            db.add_all(BackfillShard(name=self.name, start_block=start, end_block=end) for start, end in ranges)
+            db.commit()
+            print(f"Planned backfill of blocks {from_block}-{hand_off} in {len(ranges)} shards")
+            return ranges
+        finally:
+            db.close()
+
+    def _commit_shard(self, start_block: int, events: List):
+        """Write a shard's events and mark it done in one transaction"""
+        db = SessionLocal()
+        try:
+            if events:
+                self.indexer.handler(db, events)
+            shard = db.get(BackfillShard, (self.name, start_block))
+            shard.done = True
+            shard.events = len(events)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _executor(self) -> Executor:
+        pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        return pool(max_workers=self.workers, initializer=_init_worker)
+
+    def run(self, from_block: Optional[int] = None, replan: bool = False) -> dict:
+        """Backfill every unfinished shard; returns a summary"""
+        pending: Deque[Tuple[int, int]] = deque(self.plan(from_block, replan))
+        total_shards = len(pending)
+        blocks = sum(end - start + 1 for start, end in pending)
+        events = 0
+        started = time.monotonic()
+
+        with self._executor() as executor:
+            # Bounded lookahead keeps every worker busy without buffering the whole chain
+            inflight = deque()
+            done = 0
+            while pending or inflight:
+                while pending and len(inflight) < self.workers * 2:
+                    start, end = pending.popleft()
+                    inflight.append((start, end, executor.submit(fetch_shard, start, end)))
+
+                start, end, future = inflight.popleft()
+                shard_events = future.result()
+                self._commit_shard(start, shard_events)
+                events += len(shard_events)
+                done += 1
+
+                elapsed = time.monotonic() - started
+                print(f"Backfilled shard {done}/{total_shards} (blocks {start}-{end}, {len(shard_events)} events, "
+                      f"{blocks * done / total_shards / elapsed:.0f} blocks/s)")
+
+        if events:
+            invalidate_lists()
+        elapsed = time.monotonic() - started
+        return {
+            "shards": total_shards,
+            "blocks": blocks,
+            "events": events,
+            "workers": self.workers,
+            "elapsed_s": round(elapsed, 3),
+            "blocks_per_s": round(blocks / elapsed, 1) if elapsed else None,
+        }
@@ -0,0 +1,128 @@
+"""
+Block timestamps resolved with batched JSON-RPC requests
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from sqlalchemy import bindparam, select, update
+from web3.exceptions import BlockNotFound
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.nft import NFT
+from app.services.rpc_batch import rpc_batch
+from app.services.stats import rebuild_daily_stats
+
+
+class BlockTimestamps:
+    """
+    Look up block timestamps, fetching unknown blocks in JSON-RPC batches.
+
+    Headers are kept in an LRU keyed by block number together with their
+    hash, so each block is fetched at most once while cached, and a block
+    replaced by a reorg is fetched again instead of served stale.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        rpc_url: str = settings.IRYS_RPC_URL,
+        batch_size: int = settings.BLOCK_TIMESTAMP_BATCH_SIZE,
+        max_entries: int = settings.BLOCK_TIMESTAMP_CACHE_SIZE
+    ):
+        self.session = session
+        self.rpc_url = rpc_url
+        self.batch_size = max(1, batch_size)
+        self.max_entries = max_entries
+        # block number -> (block hash, timestamp)
+        self._headers: "OrderedDict[int, Tuple[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, blocks: Dict[int, Optional[str]]) -> Dict[int, int]:
+        """
+        Get timestamps (Unix seconds) for block numbers.
+
+        blocks maps each number to its expected hash, or None to accept
+        whatever block is canonical now. Raises BlockNotFound if a block is
+        missing or no longer has the expected hash.
+        """
+        timestamps = {}
+        with self._lock:
+            for number, block_hash in blocks.items():
+                header = self._headers.get(number)
+                if header is not None and (block_hash is None or header[0] == block_hash):
+                    self._headers.move_to_end(number)
+                    timestamps[number] = header[1]
+
+        missing = sorted(number for number in blocks if number not in timestamps)
+        for i in range(0, len(missing), self.batch_size):
+            headers = self._fetch(missing[i:i + self.batch_size])
+            with self._lock:
+                for number, header in headers.items():
+                    self._headers[number] = header
+                    self._headers.move_to_end(number)
+                while len(self._headers) > self.max_entries:
+                    self._headers.popitem(last=False)
+
+            for number, (block_hash, timestamp) in headers.items():
+                if blocks[number] is not None and block_hash != blocks[number]:
+                    raise BlockNotFound(f"Block {number} is no longer {blocks[number]}")
+                timestamps[number] = timestamp
+        return timestamps
+
+    def _fetch(self, numbers: List[int]) -> Dict[int, Tuple[str, int]]:
+        """Fetch headers for block numbers in one batched request"""
+        replies = rpc_batch(
+            self.session,
+            [("eth_getBlockByNumber", [hex(number), False]) for number in numbers],
+            self.rpc_url
+        )
+        headers = {}
+        for number, reply in zip(numbers, replies):
+            block = reply.get("result")
+            if block is None:
+                raise BlockNotFound(f"Block {number} not found")
+            headers[number] = (block["hash"], int(block["timestamp"], 16))
+        return headers
+
+
+def backfill_minted_at(block_times: BlockTimestamps, from_block: int = 0, batch_blocks: int = 1000) -> dict:
+    """
+    Restamp nfts.minted_at with block time for rows indexed before it was recorded.
+
+    Blocks are processed in ascending batches, each committed on its own, so
+    the job can be stopped and restarted with --from-block. The daily rollup
+    is rebuilt at the end since rows may move between days.
+    """
+    table = NFT.__table__
+    restamp = (
+        update(table)
+        .where(table.c.block_number == bindparam("block"))
+        .values(minted_at=bindparam("block_time"))
+    )
+    db = SessionLocal()
+    try:
+        numbers = db.execute(
+            select(table.c.block_number).where(table.c.block_number >= from_block)
+            .distinct().order_by(table.c.block_number)
+        ).scalars().all()
+
+        for i in range(0, len(numbers), batch_blocks):
+            batch = numbers[i:i + batch_blocks]
+            timestamps = block_times.get_many({number: None for number in batch})
+            db.execute(restamp, [
+                {"block": number, "block_time": datetime.fromtimestamp(timestamps[number], timezone.utc)}
+                for number in batch
+            ])
+            db.commit()
+            print(f"Restamped mints up to block {batch[-1]} ({i + len(batch)}/{len(numbers)} blocks)")
+
+        rebuild_daily_stats(db)
+        db.commit()
+    finally:
+        db.close()
+    return {"blocks": len(numbers)}
@@ -3,25 +3,52 @@ Blockchain service for interacting with IRYS Testnet
 """
 
 import asyncio
-import json
-from typing import Optional, Dict, Any
-from web3 import Web3
-from web3.middleware import geth_poa_middleware
+import threading
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional, Dict, Any
+import requests
+from fastapi import FastAPI, Request
+from requests.adapters import HTTPAdapter
 from app.core.config import settings
-from app.database import get_db
-from app.models.nft import NFT, NFTCreate
+from app.core.executor import run_blocking
+from app.core.metrics import rpc_metrics_middleware
+from app.core.http_cache import invalidate_lists, invalidate_nfts
+from app.models.nft import NFTCreate, TransferCreate
+from app.services.cache import get_cache
+from app.services.event_stream import EventHub, mint_event
+from app.services.ingest import IngestResult, apply_transfers, bulk_insert_nfts, rollback_after_block
 from sqlalchemy.orm import Session
 
+if TYPE_CHECKING:
+    from app.services.indexer import BlockIndexer
+
+CACHE_KEY_MINT_PRICE = "chain:mint_price"
+CACHE_KEY_TOTAL_SUPPLY = "chain:total_supply"
+CACHE_KEY_LATEST_BLOCK = "chain:latest_block"
+
+INDEXED_EVENTS = ["NFTMinted", "Transfer", "MintPriceUpdated"]
+
 
 class BlockchainService:
     """Service for blockchain interactions"""
     
-    def __init__(self):
-        """Initialize blockchain service"""
-        self.w3 = Web3(Web3.HTTPProvider(settings.IRYS_RPC_URL))
+    def __init__(self, event_hub: Optional[EventHub] = None):
+        """Initialize blockchain service; indexed mints are pushed to event_hub if given"""
+        # web3 takes over a second to import, so it is loaded with the first service
+        from web3 import Web3
+        from web3.middleware import geth_poa_middleware
+        from app.services.block_times import BlockTimestamps
+        
+        self.session = self._create_session()
+        self.w3 = Web3(Web3.HTTPProvider(
+            settings.IRYS_RPC_URL,
+            request_kwargs={"timeout": (settings.RPC_CONNECT_TIMEOUT, settings.RPC_READ_TIMEOUT)},
+            session=self.session
+        ))
         
         # Add PoA middleware for IRYS
         self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        self.w3.middleware_onion.add(rpc_metrics_middleware, "metrics")
         
         self.contract_address = settings.CONTRACT_ADDRESS
         self.private_key = settings.PRIVATE_KEY
@@ -39,6 +66,24 @@ class BlockchainService:
                 "name": "NFTMinted",
                 "type": "event"
             },
+            {
+                "anonymous": False,
+                "inputs": [
+                    {"indexed": False, "internalType": "uint256", "name": "newPrice", "type": "uint256"}
+                ],
+                "name": "MintPriceUpdated",
+                "type": "event"
+            },
+            {
+                "anonymous": False,
+                "inputs": [
+                    {"indexed": True, "internalType": "address", "name": "from", "type": "address"},
+                    {"indexed": True, "internalType": "address", "name": "to", "type": "address"},
+                    {"indexed": True, "internalType": "uint256", "name": "tokenId", "type": "uint256"}
+                ],
+                "name": "Transfer",
+                "type": "event"
+            },
             {
                 "inputs": [],
                 "name": "mintPrice",
@@ -52,6 +97,27 @@ class BlockchainService:
                 "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
                 "stateMutability": "view",
                 "type": "function"
+            },
+            {
+                "inputs": [],
+                "name": "getCurrentTokenId",
+                "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [{"internalType": "uint256", "name": "tokenId", "type": "uint256"}],
+                "name": "ownerOf",
+                "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+                "stateMutability": "view",
+                "type": "function"
+            },
+            {
+                "inputs": [{"internalType": "uint256", "name": "tokenId", "type": "uint256"}],
+                "name": "tokenURI",
+                "outputs": [{"internalType": "string", "name": "", "type": "string"}],
+                "stateMutability": "view",
+                "type": "function"
             }
         ]
         
@@ -60,20 +126,61 @@ class BlockchainService:
             abi=self.contract_abi
         ) if self.contract_address else None
         
+        self.cache = get_cache()
+        self.block_times = BlockTimestamps(self.session)
+        self.event_hub = event_hub
+        self.last_seen_head = None
+        self.indexer = None
         self.event_listener_task = None
         self.is_listening = False
     
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Create a keep-alive HTTP session with a bounded connection pool"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.RPC_POOL_SIZE,
+            max_retries=settings.RPC_MAX_RETRIES
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def close(self):
+        """Release pooled RPC connections"""
+        self.session.close()
+    
     async def start_event_listener(self):
         """Start listening for contract events"""
         if not self.contract or self.is_listening:
             return
             
         self.is_listening = True
+        self.indexer = self.create_indexer()
         self.event_listener_task = asyncio.create_task(self._listen_for_events())
     
+    def create_indexer(self, **kwargs) -> "BlockIndexer":
+        """Build the contract event indexer wired to this service's handlers"""
+        from app.services.indexer import BlockIndexer
+        
+        return BlockIndexer(
+            self.w3,
+            self.contract,
+            event_names=INDEXED_EVENTS,
+            handler=self._handle_events,
+            on_head=self._on_new_head,
+            after_commit=self._after_chunk_commit,
+            on_rollback=self._rollback_events,
+            block_times=self.block_times,
+            **kwargs
+        )
+    
     async def stop_event_listener(self):
         """Stop listening for contract events"""
         self.is_listening = False
+        if self.indexer:
+            self.indexer.stop()
         if self.event_listener_task:
             self.event_listener_task.cancel()
             try:
@@ -82,88 +189,93 @@ class BlockchainService:
                 pass
     
     async def _listen_for_events(self):
-        """Listen for NFT minting events"""
+        """Listen for NFT minting events from the last indexed block"""
         if not self.contract:
             return
-            
-        # Get the latest block
-        latest_block = self.w3.eth.get_block('latest')
-        from_block = latest_block.number - 100  # Listen to last 100 blocks
         
-        while self.is_listening:
-            try:
-                # Get new events
-                events = self.contract.events.NFTMinted.get_logs(
-                    fromBlock=from_block,
-                    toBlock='latest'
-                )
-                
-                for event in events:
-                    await self._handle_nft_minted_event(event)
-                
-                from_block = latest_block.number + 1
-                latest_block = self.w3.eth.get_block('latest')
-                
-                # Wait before next check
-                await asyncio.sleep(10)
-                
-            except Exception as e:
-                print(f"Error in event listener: {e}")
-                await asyncio.sleep(30)
-    
-    async def _handle_nft_minted_event(self, event):
-        """Handle NFT minted event"""
-        try:
-            # Extract event data
-            token_id = event.args.tokenId
-            owner_address = event.args.to
-            token_uri = event.args.tokenURI
-            
-            # Get transaction details
-            tx_hash = event.transactionHash.hex()
-            block_number = event.blockNumber
-            
-            # Create NFT record
-            nft_data = NFTCreate(
-                token_id=token_id,
-                owner_address=owner_address,
-                token_uri=token_uri,
-                transaction_hash=tx_hash,
-                block_number=block_number
-            )
-            
-            # Save to database
-            await self._save_nft_to_db(nft_data)
-            
-            print(f"NFT minted: Token ID {token_id} to {owner_address}")
-            
-        except Exception as e:
-            print(f"Error handling NFT minted event: {e}")
+        await self.indexer.run()
+    
+    def _handle_events(self, db: Session, events) -> Optional[IngestResult]:
+        """Handle a chunk of decoded contract events in one transaction"""
+        nfts = []
+        transfers = []
+        for event in events:
+            if event.event == "NFTMinted":
+                nft_data = self._nft_from_minted_event(event)
+                if nft_data:
+                    nfts.append(nft_data)
+            elif event.event == "Transfer":
+                transfers.append(TransferCreate(
+                    token_id=event.args.tokenId,
+                    from_address=event.args["from"],
+                    to_address=event.args.to,
+                    transaction_hash=event.transactionHash.hex(),
+                    block_number=event.blockNumber,
+                    log_index=event.logIndex
+                ))
+            elif event.event == "MintPriceUpdated":
+                self.cache.invalidate(CACHE_KEY_MINT_PRICE)
+        
+        if not nfts and not transfers:
+            return None
+        
+        # Mints first, so transfers in the same chunk find their NFT rows
+        result = IngestResult(
+            inserted=bulk_insert_nfts(db, nfts),
+            transferred=apply_transfers(db, transfers)
+        )
+        if nfts:
+            self.cache.invalidate(CACHE_KEY_TOTAL_SUPPLY)
+        return result
+    
+    def _rollback_events(self, db: Session, fork_point: int) -> IngestResult:
+        """Undo rows from blocks orphaned by a reorg, in the indexer's rollback transaction"""
+        result = rollback_after_block(db, fork_point)
+        self.cache.invalidate(CACHE_KEY_TOTAL_SUPPLY, CACHE_KEY_MINT_PRICE)
+        return result
+    
+    async def _after_chunk_commit(self, result: IngestResult):
+        """Drop cached responses that newly committed rows make stale"""
+        changed = result.transferred + result.removed
+        if changed:
+            await run_blocking(invalidate_nfts, changed)
+        if result.inserted or changed:
+            await run_blocking(invalidate_lists)
+        if self.event_hub and result.inserted:
+            await self.event_hub.publish([mint_event(row) for row in result.inserted])
     
-    async def _save_nft_to_db(self, nft_data: NFTCreate):
-        """Save NFT data to database"""
+    def _on_new_head(self, head: int):
+        """Refresh block-scoped cache entries when the indexer sees a new head"""
+        if head != self.last_seen_head:
+            self.last_seen_head = head
+            self.cache.set(CACHE_KEY_LATEST_BLOCK, head, settings.IRYS_BLOCK_TIME_SECONDS)
+            self.cache.invalidate(CACHE_KEY_TOTAL_SUPPLY)
+    
+    def _nft_from_minted_event(self, event) -> Optional[NFTCreate]:
+        """Build an NFT record from an NFTMinted event"""
         try:
-            db = next(get_db())
-            nft = NFT(
-                token_id=nft_data.token_id,
-                owner_address=nft_data.owner_address,
-                token_uri=nft_data.token_uri,
-                metadata=json.dumps(nft_data.metadata) if nft_data.metadata else None,
-                transaction_hash=nft_data.transaction_hash,
-                block_number=nft_data.block_number
+            minted_at = None
+            if "blockTimestamp" in event:
+                minted_at = datetime.fromtimestamp(event.blockTimestamp, timezone.utc)
+            return NFTCreate(
+                token_id=event.args.tokenId,
+                owner_address=event.args.to,
+                token_uri=event.args.tokenURI,
+                transaction_hash=event.transactionHash.hex(),
+                block_number=event.blockNumber,
+                minted_at=minted_at
             )
-            db.add(nft)
-            db.commit()
-            db.refresh(nft)
         except Exception as e:
-            print(f"Error saving NFT to database: {e}")
-        finally:
-            db.close()
+            print(f"Error handling NFT minted event: {e}")
+            return None
     
     def get_mint_price(self) -> Optional[int]:
         """Get current mint price from contract"""
         if not self.contract:
             return None
+        return self.cache.get_or_load(CACHE_KEY_MINT_PRICE, settings.CACHE_MINT_PRICE_TTL, self._fetch_mint_price)
+    
+    def _fetch_mint_price(self) -> Optional[int]:
         try:
             return self.contract.functions.mintPrice().call()
         except Exception as e:
@@ -174,6 +286,9 @@ class BlockchainService:
         """Get total supply from contract"""
         if not self.contract:
             return None
+        return self.cache.get_or_load(CACHE_KEY_TOTAL_SUPPLY, settings.IRYS_BLOCK_TIME_SECONDS, self._fetch_total_supply)
+    
+    def _fetch_total_supply(self) -> Optional[int]:
         try:
             return self.contract.functions.totalSupply().call()
         except Exception as e:
@@ -189,7 +304,27 @@ class BlockchainService:
     
     def get_latest_block(self) -> Optional[int]:
         """Get latest block number"""
+        return self.cache.get_or_load(CACHE_KEY_LATEST_BLOCK, settings.IRYS_BLOCK_TIME_SECONDS, self._fetch_latest_block)
+    
+    def _fetch_latest_block(self) -> Optional[int]:
         try:
             return self.w3.eth.get_block('latest').number
         except:
             return None
+
+
+_service_lock = threading.Lock()
+
+
+def app_blockchain_service(app: FastAPI) -> BlockchainService:
+    """Get the application-scoped blockchain service, creating it on first use"""
+    if app.state.blockchain_service is None:
+        with _service_lock:
+            if app.state.blockchain_service is None:
+                app.state.blockchain_service = BlockchainService(event_hub=getattr(app.state, "event_hub", None))
+    return app.state.blockchain_service
+
+
+def get_blockchain_service(request: Request) -> BlockchainService:
+    """Get the application-scoped blockchain service"""
+    return app_blockchain_service(request.app)
@@ -0,0 +1,249 @@
+"""
+Read-through cache with per-key TTLs and request coalescing
+"""
+
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, cache_keyspace
+
+_MISSING = object()
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = settings.CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Get a value, or _MISSING if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        """Get values in key order, with _MISSING for absent or expired keys"""
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value for ttl seconds"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_many(self, items: Dict[str, Any], ttl: float):
+        """Store several values for ttl seconds"""
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def delete(self, *keys: str):
+        """Remove keys"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        """Remove every key starting with prefix"""
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+def _dumps(value: Any) -> str:
+    """JSON-encode a cache value; bytes (compressed or binary bodies) are kept as base64"""
+    def default(item):
+        if isinstance(item, bytes):
+            return {"$bytes": base64.b64encode(item).decode()}
+        raise TypeError(f"{type(item).__name__} is not cacheable")
+    return json.dumps(value, default=default)
+
+
+def _loads(raw: bytes) -> Any:
+    def object_hook(item):
+        if len(item) == 1 and "$bytes" in item:
+            return base64.b64decode(item["$bytes"])
+        return item
+    return json.loads(raw, object_hook=object_hook)
+
+
+class RedisCache:
+    """Redis-backed cache shared by all API workers; values are stored as JSON"""
+
+    def __init__(self, url: str = settings.REDIS_URL, namespace: str = settings.CACHE_NAMESPACE):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=settings.REDIS_TIMEOUT)
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self._key(key))
+        return _MISSING if raw is None else _loads(raw)
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        raws = self.client.mget([self._key(key) for key in keys])
+        return [_MISSING if raw is None else _loads(raw) for raw in raws]
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self._key(key), _dumps(value), px=max(1, int(ttl * 1000)))
+
+    def set_many(self, items: Dict[str, Any], ttl: float):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(self._key(key), _dumps(value), px=max(1, int(ttl * 1000)))
+        pipeline.execute()
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*(self._key(key) for key in keys))
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self.client.scan_iter(match=self._key(prefix) + "*", count=500))
+        if keys:
+            self.client.delete(*keys)
+
+
+class _Call:
+    """A load in progress that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ReadThroughCache:
+    """Cache front-end that coalesces concurrent misses into one load per key"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def _backend_get(self, key: str) -> Any:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            print(f"Cache read failed for {key}: {e}")
+            return _MISSING
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value without loading it on a miss"""
+        value = self._backend_get(key)
+        CACHE_REQUESTS.labels(cache_keyspace(key), "miss" if value is _MISSING else "hit").inc()
+        return default if value is _MISSING else value
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get the cached values among keys in one backend round trip; misses are left out"""
+        if not keys:
+            return {}
+        try:
+            values = self.backend.get_many(keys)
+        except Exception as e:
+            print(f"Cache read failed for {len(keys)} keys: {e}")
+            values = [_MISSING] * len(keys)
+
+        found = {}
+        for key, value in zip(keys, values):
+            CACHE_REQUESTS.labels(cache_keyspace(key), "miss" if value is _MISSING else "hit").inc()
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def get_or_load(self, key: str, ttl: float, loader: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, calling loader on a miss.
+
+        Only one caller per key runs loader at a time; the others wait for its
+        result. None results are not cached so failed reads are retried.
+        """
+        value = self._backend_get(key)
+        CACHE_REQUESTS.labels(cache_keyspace(key), "miss" if value is _MISSING else "hit").inc()
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+            if call.value is not None:
+                self.set(key, call.value, ttl)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value, ignoring backend failures"""
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            print(f"Cache write failed for {key}: {e}")
+
+    def set_many(self, items: Dict[str, Any], ttl: float):
+        """Store several values, ignoring backend failures"""
+        if not items:
+            return
+        try:
+            self.backend.set_many(items, ttl)
+        except Exception as e:
+            print(f"Cache write failed for {len(items)} keys: {e}")
+
+    def invalidate(self, *keys: str):
+        """Drop keys so the next read reloads them"""
+        try:
+            self.backend.delete(*keys)
+        except Exception as e:
+            print(f"Cache invalidation failed for {keys}: {e}")
+
+    def invalidate_prefix(self, prefix: str):
+        """Drop every key under a prefix"""
+        try:
+            self.backend.delete_prefix(prefix)
+        except Exception as e:
+            print(f"Cache invalidation failed for {prefix}*: {e}")
+
+
+_cache: Optional[ReadThroughCache] = None
+
+
+def get_cache() -> ReadThroughCache:
+    """Get the process-wide cache, using Redis when CACHE_BACKEND is "redis" """
+    global _cache
+    if _cache is None:
+        backend = RedisCache() if settings.CACHE_BACKEND == "redis" else MemoryCache()
+        _cache = ReadThroughCache(backend)
+    return _cache
@@ -0,0 +1,208 @@
+"""
+Broadcast hub that pushes indexed events to streaming clients
+"""
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.core.metrics import STREAM_CLIENTS, STREAM_DROPPED
+
+
+def _position(event_id: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """Order key of an event ID such as "1234-56" (block number, token ID)"""
+    try:
+        return tuple(int(part) for part in event_id.split("-"))
+    except (AttributeError, ValueError):
+        return None
+
+
+@dataclass
+class StreamEvent:
+    """One event as delivered to clients; serialized once however many clients receive it"""
+    id: Optional[str]
+    event: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @cached_property
+    def json(self) -> str:
+        return json.dumps({"id": self.id, "event": self.event, "data": self.data}, separators=(",", ":"))
+
+    @cached_property
+    def sse(self) -> str:
+        lines = [f"id: {self.id}"] if self.id else []
+        lines.append(f"event: {self.event}")
+        lines.append(f"data: {json.dumps(self.data, separators=(',', ':'))}")
+        return "\n".join(lines) + "\n\n"
+
+
+def mint_event(row) -> StreamEvent:
+    """Stream event for a newly inserted NFT row"""
+    return StreamEvent(
+        id=f"{row.block_number}-{row.token_id}",
+        event="mint",
+        data=jsonable_encoder({
+            "token_id": row.token_id,
+            "owner_address": row.owner_address,
+            "token_uri": row.token_uri,
+            "transaction_hash": row.transaction_hash,
+            "block_number": row.block_number,
+            "minted_at": row.minted_at,
+        })
+    )
+
+
+# Sent when a client resumes from an event that has left the replay buffer
+RESYNC_EVENT = StreamEvent(id=None, event="resync")
+
+
+class Subscriber:
+    """A connected client; its queue is bounded so a slow reader cannot hold memory"""
+
+    def __init__(self, queue_size: int = settings.STREAM_CLIENT_QUEUE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.closed = False
+
+    def offer(self, event: StreamEvent) -> bool:
+        """Queue an event without waiting; returns False if the client is too far behind"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self):
+        """Discard undelivered events and wake the reader with an end-of-stream marker"""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def next(self, timeout: float) -> Optional[StreamEvent]:
+        """Wait for the next event; None means the stream has ended. Raises asyncio.TimeoutError when idle"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class EventHub:
+    """
+    Fan out events published by the indexer to every connected client.
+
+    With the redis backend, events are published on a pub/sub channel and
+    every API worker delivers them to its own clients.
+    """
+
+    def __init__(
+        self,
+        backend: str = settings.STREAM_BACKEND,
+        replay_size: int = settings.STREAM_REPLAY_SIZE,
+        queue_size: int = settings.STREAM_CLIENT_QUEUE
+    ):
+        self.backend = backend
+        self.replay: Deque[StreamEvent] = deque(maxlen=max(1, replay_size))
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+        self.dropped = 0  # clients disconnected for falling behind
+        self.redis = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Subscribe to the shared channel when fanning out through Redis"""
+        if self.backend == "redis" and self.task is None:
+            import redis.asyncio as aioredis
+
+            self.redis = aioredis.Redis.from_url(settings.REDIS_URL)
+            self.task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """End every client stream and stop listening"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+        self.subscribers.clear()
+        STREAM_CLIENTS.set(0)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[Subscriber, List[StreamEvent]]:
+        """
+        Register a client; returns its subscriber and the buffered events after last_event_id.
+
+        If last_event_id is no longer buffered but newer events are, the
+        backlog starts with a resync event so the client reloads its list.
+        """
+        subscriber = Subscriber(self.queue_size)
+        self.subscribers.add(subscriber)
+        STREAM_CLIENTS.set(len(self.subscribers))
+
+        position = _position(last_event_id)
+        if position is None or not self.replay:
+            return subscriber, []
+
+        backlog = [event for event in self.replay if _position(event.id) > position]
+        if backlog and not any(event.id == last_event_id for event in self.replay):
+            backlog.insert(0, RESYNC_EVENT)
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        STREAM_CLIENTS.set(len(self.subscribers))
+
+    async def publish(self, events: List[StreamEvent]):
+        """Broadcast events to every client of every worker"""
+        if not events:
+            return
+        if self.redis is not None:
+            payload = json.dumps([{"id": event.id, "event": event.event, "data": event.data} for event in events])
+            try:
+                await self.redis.publish(settings.STREAM_CHANNEL, payload)
+                return
+            except Exception as e:
+                print(f"Event stream publish failed, delivering locally only: {e}")
+        self._deliver(events)
+
+    def _deliver(self, events: List[StreamEvent]):
+        """Buffer events and queue them for local clients, dropping clients that are full"""
+        for event in events:
+            self.replay.append(event)
+            for subscriber in list(self.subscribers):
+                if not subscriber.offer(event):
+                    self.unsubscribe(subscriber)
+                    subscriber.close()
+                    self.dropped += 1
+                    STREAM_DROPPED.inc()
+
+    async def _listen(self):
+        """Deliver events published by any worker, resubscribing after connection errors"""
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(settings.STREAM_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._deliver([StreamEvent(**item) for item in json.loads(message["data"])])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Event stream subscription failed: {e}")
+                await asyncio.sleep(settings.STREAM_KEEPALIVE_SECONDS)
+
+
+def get_event_hub(connection: HTTPConnection) -> EventHub:
+    """Get the application-scoped event hub"""
+    return connection.app.state.event_hub
@@ -0,0 +1,171 @@
+"""
+Streaming bulk export of the NFT table
+"""
+
+import csv
+import importlib.util
+import io
+import json
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Select, select
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.nft import NFT
+
+# Format name -> media type
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_COLUMNS = [
+    NFT.token_id,
+    NFT.owner_address,
+    NFT.token_uri,
+    NFT.metadata_.label("metadata"),
+    NFT.minted_at,
+    NFT.block_number,
+    NFT.transaction_hash,
+]
+
+
+def export_statement(
+    owner_address: Optional[str] = None,
+    from_block: Optional[int] = None,
+    to_block: Optional[int] = None,
+    minted_after: Optional[datetime] = None,
+    minted_before: Optional[datetime] = None
+) -> Select:
+    """Select the exported columns of active NFTs matching the filters, in token order"""
+    stmt = select(*EXPORT_COLUMNS).where(NFT.is_active == True).order_by(NFT.token_id)
+    if owner_address:
+        stmt = stmt.where(NFT.owner_address == owner_address)
+    if from_block is not None:
+        stmt = stmt.where(NFT.block_number >= from_block)
+    if to_block is not None:
+        stmt = stmt.where(NFT.block_number <= to_block)
+    if minted_after is not None:
+        stmt = stmt.where(NFT.minted_at >= minted_after)
+    if minted_before is not None:
+        stmt = stmt.where(NFT.minted_at < minted_before)
+    return stmt
+
+
+def _batches(stmt: Select, batch_size: int) -> Iterator[List]:
+    """
+    Yield result rows in batches from a server-side cursor.
+
+    The export is one ordered scan, so memory stays at one batch however many
+    rows match, and there is no OFFSET to re-walk per page. The session is
+    owned here so it lives exactly as long as the stream.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield rows
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(batches: Iterator[List]) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(row._asdict(), default=_json_default, separators=(",", ":")) + "\n" for row in rows
+        ).encode()
+
+
+def _encode_csv(batches: Iterator[List]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column.key for column in EXPORT_COLUMNS)
+    for rows in batches:
+        for row in rows:
+            record = row._asdict()
+            if record["metadata"] is not None:
+                record["metadata"] = json.dumps(record["metadata"], separators=(",", ":"))
+            if record["minted_at"] is not None:
+                record["minted_at"] = record["minted_at"].isoformat()
+            writer.writerow(record.values())
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the caller in pieces"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _encode_parquet(batches: Iterator[List]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("token_id", pa.int64()),
+        ("owner_address", pa.string()),
+        ("token_uri", pa.string()),
+        ("metadata", pa.string()),
+        ("minted_at", pa.timestamp("us")),
+        ("block_number", pa.int64()),
+        ("transaction_hash", pa.string()),
+    ])
+    sink = _ChunkSink()
+    # Each batch becomes one row group, flushed to the client as soon as it is written
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in batches:
+            columns = {name: list(values) for name, values in zip(schema.names, zip(*rows))}
+            columns["metadata"] = [
+                json.dumps(value, separators=(",", ":")) if value is not None else None
+                for value in columns["metadata"]
+            ]
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+_ENCODERS = {"ndjson": _encode_ndjson, "csv": _encode_csv, "parquet": _encode_parquet}
+
+
+def stream_export(fmt: str, stmt: Select, batch_size: int = settings.EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Get an iterator of encoded export bytes.
+
+    Raises ValueError up front, before anything is streamed, for an unknown
+    format or when Parquet is requested without pyarrow installed.
+    """
+    if fmt not in _ENCODERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ValueError("Parquet export requires pyarrow")
+    return _ENCODERS[fmt](_batches(stmt, batch_size))
@@ -0,0 +1,393 @@
+"""
+Checkpointed block-range indexer for contract events
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from eth_utils import event_abi_to_log_topic
+from requests.exceptions import Timeout
+from web3.datastructures import AttributeDict
+from web3.exceptions import BlockNotFound
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.metrics import (
+    INDEXER_CHECKPOINT, INDEXER_CHUNK_SIZE, INDEXER_EVENTS, INDEXER_HEAD, INDEXER_LAG, INDEXER_REORGS,
+    record_span, span
+)
+from app.database import SessionLocal, dialect_insert
+from app.models.indexer import IndexedBlock, IndexerCheckpoint
+from app.services.block_times import BlockTimestamps
+
+
+# Substrings RPC providers use when an eth_getLogs range is too wide
+RANGE_ERROR_MARKERS = (
+    "block range",
+    "range too large",
+    "range is too large",
+    "too many",
+    "more than",
+    "limit exceeded",
+    "response size",
+    "query timeout",
+    "-32005",
+)
+
+
+def is_range_too_large(error: Exception) -> bool:
+    """Check whether an RPC error means the requested block range was too large"""
+    if isinstance(error, Timeout):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RANGE_ERROR_MARKERS)
+
+
+class ReorgDetected(Exception):
+    """The chain no longer matches the block hashes the indexer recorded"""
+
+
+class AdaptiveChunker:
+    """Block window that shrinks on oversized ranges and grows on fast responses"""
+
+    def __init__(
+        self,
+        initial: int = settings.INDEXER_INITIAL_CHUNK,
+        minimum: int = settings.INDEXER_MIN_CHUNK,
+        maximum: int = settings.INDEXER_MAX_CHUNK,
+        fast_seconds: float = settings.INDEXER_FAST_RESPONSE_SECONDS,
+        grow_after: int = settings.INDEXER_GROW_AFTER
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.size = min(max(initial, self.minimum), self.maximum)
+        self.fast_seconds = fast_seconds
+        self.grow_after = max(1, grow_after)
+        self.fast_streak = 0
+
+    def shrink(self) -> bool:
+        """Halve the window; returns False if it is already at the minimum"""
+        self.fast_streak = 0
+        if self.size <= self.minimum:
+            return False
+        self.size = max(self.minimum, self.size // 2)
+        return True
+
+    def record_success(self, elapsed: float):
+        """Double the window after enough consecutive fast responses"""
+        if elapsed >= self.fast_seconds:
+            self.fast_streak = 0
+            return
+        self.fast_streak += 1
+        if self.fast_streak >= self.grow_after:
+            self.fast_streak = 0
+            self.size = min(self.maximum, self.size * 2)
+
+
+class BlockIndexer:
+    """Scan contract logs forward from a persisted checkpoint in bounded chunks"""
+
+    def __init__(
+        self,
+        w3,
+        contract,
+        event_names: List[str],
+        handler: Callable[[Session, List], Any],
+        name: str = "nft_events",
+        chunker: Optional[AdaptiveChunker] = None,
+        on_head: Optional[Callable[[int], None]] = None,
+        after_commit: Optional[Callable[[Any], Awaitable[None]]] = None,
+        on_rollback: Optional[Callable[[Session, int], Any]] = None,
+        confirmations: int = settings.INDEXER_CONFIRMATIONS,
+        reorg_window: int = settings.INDEXER_REORG_WINDOW,
+        block_times: Optional[BlockTimestamps] = None
+    ):
+        self.w3 = w3
+        self.contract = contract
+        self.handler = handler
+        self.on_head = on_head
+        self.after_commit = after_commit
+        # Undoes handler writes for blocks after a fork point, in the rollback transaction
+        self.on_rollback = on_rollback
+        self.name = name
+        self.chunker = chunker or AdaptiveChunker()
+        self.confirmations = max(0, confirmations)
+        self.reorg_window = max(1, reorg_window)
+        # Adds blockTimestamp to decoded events when given
+        self.block_times = block_times
+
+        # topic0 -> contract event used to decode matching logs
+        self.events_by_topic: Dict[bytes, object] = {}
+        for event_name in event_names:
+            event = getattr(self.contract.events, event_name)()
+            self.events_by_topic[bytes(event_abi_to_log_topic(event.abi))] = event
+
+        self.is_running = False
+
+    def load_checkpoint(self) -> Optional[int]:
+        """Get the last processed block, if any"""
+        db = SessionLocal()
+        try:
+            checkpoint = db.get(IndexerCheckpoint, self.name)
+            return checkpoint.last_block if checkpoint else None
+        finally:
+            db.close()
+
+    def save_checkpoint(self, db: Session, block_number: int):
+        """Record the last processed block in the caller's transaction"""
+        checkpoint = db.get(IndexerCheckpoint, self.name)
+        if checkpoint:
+            checkpoint.last_block = block_number
+        else:
+            db.add(IndexerCheckpoint(name=self.name, last_block=block_number))
+
+    def _stored_hash(self, block_number: int) -> Optional[str]:
+        """Get the recorded hash of a processed block, if it is still kept"""
+        db = SessionLocal()
+        try:
+            block = db.get(IndexedBlock, (self.name, block_number))
+            return block.hash if block else None
+        finally:
+            db.close()
+
+    def _block_hash(self, block_number: int) -> Optional[str]:
+        """Get the canonical hash of a block, or None past the chain tip"""
+        try:
+            block = self.w3.eth.get_block(block_number)
+        except BlockNotFound:
+            return None
+        return block["hash"].hex() if block else None
+
+    def save_block_hashes(self, db: Session, hashes: Dict[int, str]):
+        """Record processed block hashes and drop those older than the reorg window"""
+        if not hashes:
+            return
+        table = IndexedBlock.__table__
+        stmt = dialect_insert(db, table).values([
+            {"name": self.name, "number": number, "hash": block_hash}
+            for number, block_hash in sorted(hashes.items())
+        ])
+        db.execute(stmt.on_conflict_do_update(index_elements=["name", "number"], set_={"hash": stmt.excluded.hash}))
+
+        cutoff = db.execute(
+            select(table.c.number)
+            .where(table.c.name == self.name)
+            .order_by(table.c.number.desc())
+            .offset(self.reorg_window)
+            .limit(1)
+        ).scalar()
+        if cutoff is not None:
+            db.execute(delete(table).where(table.c.name == self.name, table.c.number <= cutoff))
+
+    def _start_block(self, head: int) -> int:
+        """Get the first block to scan"""
+        last_block = self.load_checkpoint()
+        if last_block is not None:
+            return last_block + 1
+        if settings.INDEXER_START_BLOCK >= 0:
+            return settings.INDEXER_START_BLOCK
+        return max(0, head - 100)
+
+    def _fetch_chunk(self, from_block: int, to_block: int):
+        """
+        Fetch a chunk's events and the hash of its last block.
+
+        Raises ReorgDetected if from_block no longer builds on the last
+        recorded block, or if the chain tip moved to another branch while the
+        logs were being read.
+        """
+        try:
+            first = self.w3.eth.get_block(from_block)
+        except BlockNotFound:
+            raise ReorgDetected(f"block {from_block} is no longer on the chain")
+        expected_parent = self._stored_hash(from_block - 1)
+        if expected_parent is not None and first["parentHash"].hex() != expected_parent:
+            raise ReorgDetected(f"block {from_block} does not build on the indexed block {from_block - 1}")
+
+        last_hash = first["hash"].hex() if to_block == from_block else self._block_hash(to_block)
+        events = self._fetch_logs(from_block, to_block)
+        # Hashes chain, so an unchanged last block means the logs all came from one branch
+        if self._block_hash(to_block) != last_hash:
+            raise ReorgDetected(f"chain changed while reading blocks {from_block}-{to_block}")
+        return events, last_hash
+
+    def _find_fork_point(self, before_block: int) -> int:
+        """Get the newest recorded block below before_block that is still canonical"""
+        db = SessionLocal()
+        try:
+            recorded = db.execute(
+                select(IndexedBlock.number, IndexedBlock.hash)
+                .where(IndexedBlock.name == self.name, IndexedBlock.number < before_block)
+                .order_by(IndexedBlock.number.desc())
+            ).all()
+        finally:
+            db.close()
+
+        for number, block_hash in recorded:
+            if self._block_hash(number) == block_hash:
+                return number
+        if recorded:
+            print(f"Reorg deeper than the {self.reorg_window}-block window; re-indexing from block {recorded[-1].number}")
+            return recorded[-1].number - 1
+        return before_block - 1
+
+    def _rollback(self, fork_point: int) -> Any:
+        """Undo every block after fork_point and move the checkpoint back, in one transaction"""
+        db = SessionLocal()
+        try:
+            result = self.on_rollback(db, fork_point) if self.on_rollback else None
+            db.execute(delete(IndexedBlock).where(IndexedBlock.name == self.name, IndexedBlock.number > fork_point))
+            self.save_checkpoint(db, fork_point)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def rewind(self, from_block: int) -> int:
+        """Roll back to the fork point below from_block; returns the next block to scan"""
+        fork_point = await run_blocking(self._find_fork_point, from_block)
+        print(f"Chain reorganization detected at block {from_block}; rolling back to block {fork_point}")
+        INDEXER_REORGS.labels(self.name).inc()
+        result = await run_blocking(self._rollback, fork_point)
+        if self.after_commit and result is not None:
+            await self.after_commit(result)
+        return fork_point + 1
+
+    def _fetch_logs(self, from_block: int, to_block: int, topics: Optional[List] = None) -> List:
+        """Fetch and decode contract logs for an inclusive block range; topics narrow the filter"""
+        logs = self.w3.eth.get_logs({
+            "address": self.contract.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": topics or [list(self.events_by_topic.keys())]
+        })
+
+        events = []
+        for log in logs:
+            event = self.events_by_topic.get(bytes(log["topics"][0]))
+            if event is not None:
+                events.append(event.process_log(log))
+                INDEXER_EVENTS.labels(self.name, events[-1].event).inc()
+
+        if self.block_times and events:
+            try:
+                timestamps = self.block_times.get_many({event.blockNumber: event.blockHash.hex() for event in events})
+            except BlockNotFound as e:
+                raise ReorgDetected(str(e))
+            events = [AttributeDict({**event, "blockTimestamp": timestamps[event.blockNumber]}) for event in events]
+        return events
+
+    def fetch_range(self, from_block: int, to_block: int, topics: Optional[List] = None) -> List:
+        """Fetch events from a range of any size in windows, shrinking them on provider range limits"""
+        chunker = AdaptiveChunker()
+        events = []
+        block = from_block
+        while block <= to_block:
+            end = min(block + chunker.size - 1, to_block)
+            started = time.monotonic()
+            try:
+                events.extend(self._fetch_logs(block, end, topics))
+            except Exception as e:
+                if is_range_too_large(e) and chunker.shrink():
+                    continue
+                raise
+            chunker.record_success(time.monotonic() - started)
+            block = end + 1
+        return events
+
+    async def run_once(self, from_block: int, head: int) -> int:
+        """Process one chunk starting at from_block; returns the next block to scan"""
+        while True:
+            to_block = min(from_block + self.chunker.size - 1, head)
+            started = time.monotonic()
+            INDEXER_CHUNK_SIZE.labels(self.name).set(self.chunker.size)
+            try:
+                events, last_hash = await run_blocking(self._fetch_chunk, from_block, to_block)
+            except ReorgDetected:
+                return await self.rewind(from_block)
+            except Exception as e:
+                if is_range_too_large(e) and self.chunker.shrink():
+                    print(f"Indexer range {from_block}-{to_block} too large, retrying with {self.chunker.size} blocks")
+                    continue
+                raise
+            elapsed = time.monotonic() - started
+            self.chunker.record_success(elapsed)
+            record_span(
+                "indexer.fetch_chunk", elapsed,
+                indexer=self.name, from_block=from_block, to_block=to_block, events=len(events)
+            )
+            break
+
+        result = await run_blocking(self._commit_chunk, events, to_block, last_hash)
+        if self.after_commit and result is not None:
+            await self.after_commit(result)
+        return to_block + 1
+
+    def _commit_chunk(self, events: List, to_block: int, last_hash: str) -> Any:
+        """
+        Write a chunk, its block hashes and its checkpoint in one transaction,
+        so a crash replays the whole chunk.
+
+        Returns the handler's result, which is passed to after_commit.
+        """
+        # Blocks with events are recorded too, so a fork point is found close to the tip
+        hashes = {event.blockNumber: event.blockHash.hex() for event in events}
+        hashes[to_block] = last_hash
+
+        db = SessionLocal()
+        try:
+            with span("indexer.commit_chunk", indexer=self.name, to_block=to_block, events=len(events)):
+                result = self.handler(db, events) if events else None
+                self.save_block_hashes(db, hashes)
+                self.save_checkpoint(db, to_block)
+                db.commit()
+            INDEXER_CHECKPOINT.labels(self.name).set(to_block)
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run(self):
+        """Index forward until stopped, catching up without sleeping while behind"""
+        self.is_running = True
+        next_block = None
+
+        while self.is_running:
+            try:
+                latest = await run_blocking(lambda: self.w3.eth.block_number)
+                if self.on_head:
+                    await run_blocking(self.on_head, latest)
+                # Only blocks with enough confirmations are indexed
+                head = latest - self.confirmations
+                INDEXER_HEAD.labels(self.name).set(latest)
+                if next_block is None:
+                    next_block = await run_blocking(self._start_block, head)
+                INDEXER_LAG.labels(self.name).set(max(0, latest - (next_block - 1)))
+
+                if next_block > head:
+                    await asyncio.sleep(settings.INDEXER_POLL_INTERVAL)
+                    continue
+
+                next_block = await self.run_once(next_block, head)
+
+                # Yield to other tasks between chunks while catching up
+                await asyncio.sleep(0)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in event indexer: {e}")
+                # Resume from the persisted checkpoint after a failure
+                next_block = None
+                await asyncio.sleep(settings.INDEXER_ERROR_BACKOFF)
+
+    def stop(self):
+        """Stop after the current chunk"""
+        self.is_running = False
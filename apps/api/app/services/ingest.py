@@ -0,0 +1,282 @@
+"""
+Bulk ingestion of indexed NFT rows
+"""
+
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import INGEST_ROWS, record_span
+from app.database import dialect_insert
+from app.models.nft import NFT, NFTCreate, NFTOwner, NFTTransfer, TransferCreate
+from app.services.stats import add_daily_counts, increment_daily_stats, utc_day
+
+
+@dataclass
+class IngestResult:
+    """Rows written by one indexed chunk"""
+    inserted: List[Row] = field(default_factory=list)  # newly inserted NFT rows
+    transferred: List[int] = field(default_factory=list)  # tokens whose owner changed
+    removed: List[int] = field(default_factory=list)  # tokens deleted by a reorg rollback
+
+
+def _nft_row(nft_data: NFTCreate) -> dict:
+    """Convert an NFTCreate into an insert row"""
+    now = datetime.now(timezone.utc)
+    return {
+        "token_id": nft_data.token_id,
+        "owner_address": nft_data.owner_address,
+        "token_uri": nft_data.token_uri,
+        "metadata": nft_data.metadata,
+        "transaction_hash": nft_data.transaction_hash,
+        "block_number": nft_data.block_number,
+        # Stamped here rather than by the server default so every dialect stores the same precision
+        "minted_at": nft_data.minted_at or now,
+        "updated_at": now,
+        "is_active": True,
+    }
+
+
+def bulk_insert_nfts(
+    db: Session,
+    nfts: List[NFTCreate],
+    on_conflict: str = settings.INGEST_ON_CONFLICT
+) -> List[Row]:
+    """
+    Write NFTs with multi-row INSERT ... ON CONFLICT (token_id) statements.
+
+    Runs inside the caller's transaction and does not commit, so replayed
+    chunks are idempotent. Daily rollups are updated for newly inserted rows
+    only. Returns the newly inserted rows (token_id, owner_address, token_uri,
+    transaction_hash, block_number, minted_at) in block order.
+    """
+    if not nfts:
+        return []
+
+    # A statement may not touch the same token twice; keep the latest event
+    rows = list({nft.token_id: _nft_row(nft) for nft in nfts}.values())
+
+    started = time.monotonic()
+    written = 0
+    inserted = []
+    batch_size = max(1, settings.INGEST_BATCH_SIZE)
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        # A token's transfers can be indexed before its mint (an older backfill
+        # shard written after the live listener took over), so a recorded
+        # current owner wins over the minter
+        owners = dict(db.execute(
+            select(NFTOwner.token_id, NFTOwner.owner_address)
+            .where(NFTOwner.token_id.in_([row["token_id"] for row in batch]))
+        ).all())
+        for row in batch:
+            row["owner_address"] = owners.get(row["token_id"], row["owner_address"])
+        existing = set()
+        stmt = dialect_insert(db, NFT.__table__).values(batch)
+        if on_conflict == "update":
+            # Updated rows are returned too; remember them so they are not counted as new
+            existing = set(db.execute(
+                select(NFT.token_id).where(NFT.token_id.in_([row["token_id"] for row in batch]))
+            ).scalars())
+            # owner_address is left alone: it belongs to the Transfer history
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["token_id"],
+                set_={
+                    "token_uri": stmt.excluded.token_uri,
+                    "transaction_hash": stmt.excluded.transaction_hash,
+                    "block_number": stmt.excluded.block_number,
+                    "updated_at": stmt.excluded.updated_at,
+                }
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["token_id"])
+        table = stmt.table
+        result = db.execute(stmt.returning(
+            table.c.token_id, table.c.owner_address, table.c.token_uri,
+            table.c.transaction_hash, table.c.block_number, table.c.minted_at
+        )).all()
+        written += len(result)
+        inserted.extend(row for row in result if row.token_id not in existing)
+
+    inserted.sort(key=lambda row: (row.block_number or 0, row.token_id))
+    increment_daily_stats(db, [row.minted_at for row in inserted])
+
+    INGEST_ROWS.labels("nfts").inc(len(inserted))
+    elapsed = time.monotonic() - started
+    rate = len(rows) / elapsed if elapsed > 0 else float(len(rows))
+    record_span("ingest.nfts", elapsed, rows=len(rows), written=written, new=len(inserted), rows_per_s=round(rate))
+    return inserted
+
+
+def apply_transfers(db: Session, transfers: List[TransferCreate]) -> List[int]:
+    """
+    Record Transfer events and move token ownership with batched upserts.
+
+    History rows are keyed on (block_number, log_index) and current owners
+    only advance to later transfers, so replayed or out-of-order chunks are
+    harmless. nfts.owner_address is kept in step for owner lookups. Runs in
+    the caller's transaction; returns the token IDs whose owner changed.
+    """
+    if not transfers:
+        return []
+
+    started = time.monotonic()
+    now = datetime.now(timezone.utc)
+    transfers = sorted(transfers, key=lambda transfer: (transfer.block_number, transfer.log_index))
+    batch_size = max(1, settings.INGEST_BATCH_SIZE)
+
+    history = [transfer.model_dump() for transfer in transfers]
+    for i in range(0, len(history), batch_size):
+        stmt = dialect_insert(db, NFTTransfer.__table__).values(history[i:i + batch_size])
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["block_number", "log_index"]))
+
+    # Only the last transfer of each token in the chunk decides its owner
+    latest = {transfer.token_id: transfer for transfer in transfers}
+    changed = _advance_owners(db, list(latest.values()), now)
+    _sync_nft_owners(db, changed, now)
+
+    INGEST_ROWS.labels("nft_transfers").inc(len(transfers))
+    INGEST_ROWS.labels("nft_owners").inc(len(changed))
+    elapsed = time.monotonic() - started
+    rate = len(transfers) / elapsed if elapsed > 0 else float(len(transfers))
+    record_span("ingest.transfers", elapsed, rows=len(transfers), owners_changed=len(changed), rows_per_s=round(rate))
+    return changed
+
+
+def _advance_owners(db: Session, transfers: List, now: datetime) -> List[int]:
+    """Upsert current owners, moving each token only to a later (block, log_index)"""
+    owners_table = NFTOwner.__table__
+    owners = [
+        {
+            "token_id": transfer.token_id,
+            "owner_address": transfer.to_address,
+            "block_number": transfer.block_number,
+            "log_index": transfer.log_index,
+            "updated_at": now,
+        }
+        for transfer in transfers
+    ]
+
+    changed = []
+    batch_size = max(1, settings.INGEST_BATCH_SIZE)
+    for i in range(0, len(owners), batch_size):
+        stmt = dialect_insert(db, owners_table).values(owners[i:i + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["token_id"],
+            set_={
+                "owner_address": stmt.excluded.owner_address,
+                "block_number": stmt.excluded.block_number,
+                "log_index": stmt.excluded.log_index,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=tuple_(stmt.excluded.block_number, stmt.excluded.log_index)
+            > tuple_(owners_table.c.block_number, owners_table.c.log_index)
+        )
+        changed.extend(db.execute(stmt.returning(owners_table.c.token_id)).scalars().all())
+    return changed
+
+
+def _sync_nft_owners(db: Session, token_ids: List[int], now: datetime):
+    """Copy current owners onto nfts.owner_address for owner lookups"""
+    owners_table = NFTOwner.__table__
+    nfts_table = NFT.__table__
+    current_owner = (
+        select(owners_table.c.owner_address)
+        .where(owners_table.c.token_id == nfts_table.c.token_id)
+        .scalar_subquery()
+    )
+    batch_size = max(1, settings.INGEST_BATCH_SIZE)
+    for i in range(0, len(token_ids), batch_size):
+        db.execute(
+            update(nfts_table)
+            .where(nfts_table.c.token_id.in_(token_ids[i:i + batch_size]), current_owner.isnot(None))
+            .values(owner_address=current_owner, updated_at=now)
+        )
+
+
+def resync_owners(db: Session, token_ids: List[int]):
+    """Copy the recorded current owner of tokens onto nfts; runs in the caller's transaction"""
+    _sync_nft_owners(db, token_ids, datetime.now(timezone.utc))
+
+
+def rollback_after_block(db: Session, block_number: int) -> IngestResult:
+    """
+    Undo everything indexed from blocks after block_number.
+
+    Deletes orphaned mints and transfers, subtracts the mints from the daily
+    rollup and drops the current owner of tokens whose mint was orphaned.
+    Other affected tokens move back to the owner set by their latest
+    surviving transfer or, without one, to the owner they were minted to:
+    the sender of their first orphaned transfer. Runs in the caller's
+    transaction.
+    """
+    now = datetime.now(timezone.utc)
+    nfts_table = NFT.__table__
+    removed = db.execute(
+        delete(nfts_table)
+        .where(nfts_table.c.block_number > block_number)
+        .returning(nfts_table.c.token_id, nfts_table.c.minted_at, nfts_table.c.is_active)
+    ).all()
+    add_daily_counts(db, {
+        day: -count
+        for day, count in Counter(utc_day(row.minted_at) for row in removed if row.is_active and row.minted_at).items()
+    })
+    removed_ids = [row.token_id for row in removed]
+
+    transfers_table = NFTTransfer.__table__
+    orphaned = db.execute(
+        delete(transfers_table)
+        .where(transfers_table.c.block_number > block_number)
+        .returning(
+            transfers_table.c.token_id, transfers_table.c.from_address,
+            transfers_table.c.block_number, transfers_table.c.log_index
+        )
+    ).all()
+    # Owner of each token just before its first orphaned transfer
+    previous_owner = {}
+    for row in sorted(orphaned, key=lambda row: (row.block_number, row.log_index), reverse=True):
+        previous_owner[row.token_id] = row.from_address
+
+    owners_table = NFTOwner.__table__
+    batch_size = max(1, settings.INGEST_BATCH_SIZE)
+    for i in range(0, len(removed_ids), batch_size):
+        db.execute(delete(owners_table).where(owners_table.c.token_id.in_(removed_ids[i:i + batch_size])))
+    stale = db.execute(
+        delete(owners_table)
+        .where(owners_table.c.block_number > block_number)
+        .returning(owners_table.c.token_id)
+    ).scalars().all()
+
+    restored = []
+    for i in range(0, len(stale), batch_size):
+        batch = stale[i:i + batch_size]
+        history = db.execute(
+            select(NFTTransfer)
+            .where(NFTTransfer.token_id.in_(batch))
+            .order_by(NFTTransfer.block_number, NFTTransfer.log_index)
+        ).scalars().all()
+        latest = {transfer.token_id: transfer for transfer in history}
+        # No surviving transfer: the token is back with its minter, placed
+        # before any transfer in its mint block
+        mints = db.execute(
+            select(NFT.token_id, NFT.transaction_hash, NFT.block_number)
+            .where(NFT.token_id.in_([token_id for token_id in batch if token_id not in latest]))
+        ).all()
+        for mint in mints:
+            owner = previous_owner.get(mint.token_id)
+            if owner and int(owner, 16):
+                latest[mint.token_id] = TransferCreate(
+                    token_id=mint.token_id, from_address="0x" + "00" * 20, to_address=owner,
+                    transaction_hash=mint.transaction_hash, block_number=mint.block_number, log_index=-1
+                )
+        restored.extend(_advance_owners(db, list(latest.values()), now))
+    _sync_nft_owners(db, restored, now)
+
+    print(f"Rolled back blocks after {block_number}: {len(removed_ids)} NFTs removed, {len(stale)} owners reverted")
+    return IngestResult(transferred=stale, removed=removed_ids)
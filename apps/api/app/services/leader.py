@@ -0,0 +1,214 @@
+"""
+Leader election so background pollers run in one process across workers and replicas
+"""
+
+import asyncio
+import hashlib
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.metrics import LEADER
+from app.database import SessionLocal, dialect_insert, engine
+from app.models.indexer import LeaderLease
+
+
+class AdvisoryLock:
+    """
+    Leadership held as a PostgreSQL session advisory lock.
+
+    The lock lives on a dedicated autocommit connection; if the process dies
+    the connection drops and the server releases the lock at once.
+    """
+
+    def __init__(self, role: str, bind: Engine = engine):
+        self.engine = bind
+        # Advisory lock keys are signed 64-bit integers
+        self.key = int.from_bytes(hashlib.sha256(role.encode()).digest()[:8], "big", signed=True)
+        self.connection: Optional[Connection] = None
+
+    def acquire(self) -> bool:
+        """Take or confirm the lock; False if another process holds it"""
+        if self.connection is not None:
+            try:
+                self.connection.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                self._close()
+                raise
+
+        connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = connection.execute(select(func.pg_try_advisory_lock(self.key))).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self.connection = connection
+        return True
+
+    def release(self):
+        if self.connection is not None:
+            try:
+                self.connection.execute(select(func.pg_advisory_unlock(self.key)))
+            finally:
+                self._close()
+
+    def _close(self):
+        try:
+            self.connection.invalidate()
+        finally:
+            self.connection = None
+
+
+class Lease:
+    """
+    Leadership held as a renewable lease row, for databases without advisory locks.
+
+    A holder that stops renewing loses the role once the lease expires.
+    """
+
+    def __init__(self, role: str, lease_seconds: float = settings.LEADER_LEASE_SECONDS):
+        self.role = role
+        self.lease_seconds = lease_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self) -> bool:
+        """Claim the lease if it is free or expired, or extend it if already held"""
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        table = LeaderLease.__table__
+        db = SessionLocal()
+        try:
+            db.execute(
+                dialect_insert(db, table)
+                .values(name=self.role, holder=self.holder, expires_at=expires_at)
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            db.execute(
+                update(table)
+                .where(table.c.name == self.role, or_(table.c.holder == self.holder, table.c.expires_at < now))
+                .values(holder=self.holder, expires_at=expires_at)
+            )
+            db.commit()
+            return db.execute(select(table.c.holder).where(table.c.name == self.role)).scalar() == self.holder
+        finally:
+            db.close()
+
+    def release(self):
+        """Expire the lease now so another process can take over without waiting"""
+        table = LeaderLease.__table__
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(table)
+                .where(table.c.name == self.role, table.c.holder == self.holder)
+                .values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+class LeaderElection:
+    """
+    Keep trying to become leader for a role, running callbacks on transitions.
+
+    on_elected starts the role's work and on_demoted stops it, whether
+    leadership is lost to a database failure or released at shutdown.
+    Processes that never win only serve HTTP.
+    """
+
+    def __init__(
+        self,
+        role: str,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        interval: float = settings.LEADER_CHECK_INTERVAL
+    ):
+        self.role = role
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self.claim = AdvisoryLock(role) if engine.dialect.name == "postgresql" else Lease(role)
+        self.is_leader = False
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start campaigning in the background"""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop campaigning, stepping down first if leader"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.is_leader:
+            try:
+                await self._set_leader(False)
+            except Exception as e:
+                print(f"Stopping {self.role} work failed: {e}")
+            await self._release()
+
+    async def run(self):
+        while True:
+            try:
+                leader = await run_blocking(self.claim.acquire)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Leader check for {self.role} failed: {e}")
+                leader = False
+
+            if leader != self.is_leader:
+                try:
+                    await self._set_leader(leader)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"{'Starting' if leader else 'Stopping'} {self.role} work failed: {e}")
+                    await self._step_down()
+            await asyncio.sleep(self.interval)
+
+    async def _set_leader(self, leader: bool):
+        self.is_leader = leader
+        LEADER.labels(self.role).set(1 if leader else 0)
+        print(f"{'Elected' if leader else 'Stepped down as'} {self.role} leader (pid {os.getpid()})")
+        if leader:
+            await self.on_elected()
+        else:
+            await self.on_demoted()
+
+    async def _step_down(self):
+        """
+        Give up the role after a callback failed, then keep campaigning.
+
+        Whatever on_elected started is stopped again and the claim released,
+        so no work keeps running without a lease being renewed for it.
+        """
+        if self.is_leader:
+            try:
+                await self._set_leader(False)
+            except Exception as e:
+                print(f"Stopping {self.role} work failed: {e}")
+        await self._release()
+
+    async def _release(self):
+        try:
+            await run_blocking(self.claim.release)
+        except Exception as e:
+            print(f"Failed to release {self.role} leadership: {e}")
@@ -0,0 +1,262 @@
+"""
+Background resolver that fills NFT metadata from token URIs
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote_to_bytes, urlparse
+
+import httpx
+from sqlalchemy import bindparam, select, update
+
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.http_cache import invalidate_lists, invalidate_nfts
+from app.core.metrics import INGEST_ROWS, span
+from app.database import SessionLocal
+from app.models.nft import NFT
+from app.services.cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataFetchError(Exception):
+    """A token URI could not be resolved to a JSON object"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def resolve_uri(uri: str) -> str:
+    """Map ipfs:// URIs onto the configured HTTP gateway; other URIs pass through"""
+    if uri.startswith("ipfs://"):
+        path = uri[len("ipfs://"):]
+        if path.startswith("ipfs/"):
+            path = path[len("ipfs/"):]
+        return f"{settings.IPFS_GATEWAY.rstrip('/')}/ipfs/{path}"
+    return uri
+
+
+def decode_data_uri(uri: str) -> bytes:
+    """Decode the payload of a data: URI"""
+    header, _, payload = uri[len("data:"):].partition(",")
+    if header.endswith(";base64"):
+        return base64.b64decode(payload)
+    return unquote_to_bytes(payload)
+
+
+def content_key(uri: str) -> str:
+    """Cache key addressing a URI's content, shared by every token that uses it"""
+    return "metadata:" + hashlib.sha256(resolve_uri(uri).encode()).hexdigest()
+
+
+class HostRateLimiter:
+    """Space out requests to each host to at most rate per second"""
+
+    def __init__(self, rate: float = settings.METADATA_HOST_RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class MetadataResolver:
+    """Fetch token metadata concurrently and write it back in bulk"""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or httpx.AsyncClient(
+            timeout=settings.METADATA_FETCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=settings.METADATA_CONCURRENCY)
+        )
+        self.semaphore = asyncio.Semaphore(settings.METADATA_CONCURRENCY)
+        self.rate_limiter = HostRateLimiter()
+        self.cache = get_cache()
+        # token_id -> monotonic time before which a failed token is not retried
+        self.failed_until: Dict[int, float] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.is_running = False
+
+    async def _download(self, url: str) -> bytes:
+        """GET a URL with bounded parallelism, per-host spacing and a size cap"""
+        await self.rate_limiter.wait(urlparse(url).netloc)
+        async with self.semaphore:
+            try:
+                async with self.client.stream("GET", url) as response:
+                    if response.status_code == 429 or response.status_code >= 500:
+                        raise MetadataFetchError(f"HTTP {response.status_code}", retryable=True)
+                    if response.status_code >= 400:
+                        raise MetadataFetchError(f"HTTP {response.status_code}")
+
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) > settings.METADATA_MAX_BYTES:
+                            raise MetadataFetchError("metadata document too large")
+                    return bytes(body)
+            except httpx.TransportError as e:
+                raise MetadataFetchError(str(e) or type(e).__name__, retryable=True)
+
+    async def fetch(self, uri: str) -> Dict[str, Any]:
+        """Resolve one URI to a JSON object, retrying transient failures with backoff"""
+        if uri.startswith("data:"):
+            raw = decode_data_uri(uri)
+        else:
+            url = resolve_uri(uri)
+            if urlparse(url).scheme not in ("http", "https"):
+                raise MetadataFetchError(f"unsupported URI scheme: {uri[:32]}")
+
+            attempt = 0
+            while True:
+                try:
+                    raw = await self._download(url)
+                    break
+                except MetadataFetchError as e:
+                    attempt += 1
+                    if not e.retryable or attempt > settings.METADATA_MAX_RETRIES:
+                        raise
+                    delay = settings.METADATA_RETRY_BACKOFF * 2 ** (attempt - 1)
+                    await asyncio.sleep(delay * (0.5 + random.random()))
+
+        try:
+            document = json.loads(raw)
+        except ValueError:
+            raise MetadataFetchError("metadata is not valid JSON")
+        if not isinstance(document, dict):
+            raise MetadataFetchError("metadata is not a JSON object")
+        return document
+
+    async def _fetch_cached(self, uri: str) -> Dict[str, Any]:
+        """Fetch a URI unless its content is already cached"""
+        key = content_key(uri)
+        cached = await run_blocking(self.cache.get, key)
+        if isinstance(cached, dict):
+            return cached
+        document = await self.fetch(uri)
+        await run_blocking(self.cache.set, key, document, settings.METADATA_CACHE_TTL)
+        return document
+
+    async def resolve(self, tokens: List[Tuple[int, str]]) -> Dict[int, Dict[str, Any]]:
+        """Resolve (token_id, token_uri) pairs; each distinct URI is fetched once"""
+        by_uri: Dict[str, List[int]] = {}
+        for token_id, uri in tokens:
+            by_uri.setdefault(uri, []).append(token_id)
+
+        uris = list(by_uri)
+        results = await asyncio.gather(*(self._fetch_cached(uri) for uri in uris), return_exceptions=True)
+
+        resolved = {}
+        retry_at = time.monotonic() + settings.METADATA_RETRY_AFTER
+        for uri, result in zip(uris, results):
+            if isinstance(result, Exception):
+                logger.warning("Error fetching metadata from %s for %d tokens: %s", uri[:80], len(by_uri[uri]), result)
+                for token_id in by_uri[uri]:
+                    self.failed_until[token_id] = retry_at
+                continue
+            for token_id in by_uri[uri]:
+                resolved[token_id] = result
+        return resolved
+
+    def _load_unresolved(self, after_token_id: int, limit: int) -> List[Tuple[int, str]]:
+        """Get the next tokens without metadata, in token order"""
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(NFT.token_id, NFT.token_uri)
+                .where(NFT.metadata_.is_(None), NFT.is_active == True, NFT.token_id > after_token_id)
+                .order_by(NFT.token_id)
+                .limit(limit)
+            ).all()
+            return [(row.token_id, row.token_uri) for row in rows]
+        finally:
+            db.close()
+
+    def save(self, resolved: Dict[int, Dict[str, Any]]) -> int:
+        """Write resolved metadata in one executemany UPDATE; never overwrites existing metadata"""
+        if not resolved:
+            return 0
+        table = NFT.__table__
+        stmt = (
+            update(table)
+            .where(table.c.token_id == bindparam("b_token_id"), table.c.metadata.is_(None))
+            .values(metadata=bindparam("b_metadata"))
+        )
+        db = SessionLocal()
+        try:
+            db.execute(stmt, [
+                {"b_token_id": token_id, "b_metadata": document}
+                for token_id, document in resolved.items()
+            ])
+            db.commit()
+        finally:
+            db.close()
+
+        invalidate_nfts(resolved.keys())
+        invalidate_lists()
+        return len(resolved)
+
+    async def run_once(self, after_token_id: int = -1) -> Optional[int]:
+        """Resolve one batch after a token ID; returns the last token ID seen, or None at the end"""
+        tokens = await run_blocking(self._load_unresolved, after_token_id, settings.METADATA_BATCH_SIZE)
+        if not tokens:
+            return None
+
+        now = time.monotonic()
+        pending = [(token_id, uri) for token_id, uri in tokens if self.failed_until.get(token_id, 0) <= now]
+        if pending:
+            with span("metadata.resolve_batch", tokens=len(pending)) as fields:
+                resolved = await self.resolve(pending)
+                fields["saved"] = await run_blocking(self.save, resolved)
+            INGEST_ROWS.labels("metadata").inc(fields["saved"])
+        return tokens[-1][0]
+
+    async def run(self):
+        """Sweep tokens without metadata until stopped"""
+        self.is_running = True
+        cursor = -1
+        while self.is_running:
+            try:
+                last_token_id = await self.run_once(cursor)
+                if last_token_id is None:
+                    cursor = -1
+                    await asyncio.sleep(settings.METADATA_POLL_INTERVAL)
+                else:
+                    cursor = last_token_id
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Error in metadata resolver: %s", e)
+                await asyncio.sleep(settings.METADATA_POLL_INTERVAL)
+
+    async def start(self):
+        """Start resolving in the background"""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background task and close the HTTP client"""
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.client.aclose()
@@ -0,0 +1,226 @@
+"""
+Reconciliation of indexed NFTs against the contract
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.http_cache import invalidate_lists, invalidate_nfts
+from app.database import SessionLocal
+from app.models.nft import NFT, NFTCreate
+from app.models.types import normalize_address
+from app.services.backfill import resolve_deploy_block
+from app.services.ingest import bulk_insert_nfts, resync_owners
+from app.services.rpc_batch import RPCCallError, call_many
+
+
+@dataclass
+class ReconcileReport:
+    """Differences between the database and the contract at one block"""
+    block: int
+    total_supply: int
+    current_token_id: int
+    db_count: int
+    missing: List[int] = field(default_factory=list)  # minted on chain, absent from nfts
+    owner_mismatches: List[int] = field(default_factory=list)
+    uri_mismatches: Dict[int, str] = field(default_factory=dict)  # token ID -> URI on chain
+    extra: List[int] = field(default_factory=list)  # in nfts beyond the chain's supply
+    # tokenURI() prefix the contract adds to minted URIs; None until one token shows it
+    base_uri: Optional[str] = None
+    rpc_requests: int = 0
+
+    @property
+    def consistent(self) -> bool:
+        return not (self.missing or self.owner_mismatches or self.uri_mismatches or self.extra)
+
+    def summary(self, sample: int = 20) -> dict:
+        """Counts plus the first token IDs of each kind of difference"""
+        return {
+            "block": self.block,
+            "total_supply": self.total_supply,
+            "current_token_id": self.current_token_id,
+            "db_count": self.db_count,
+            "base_uri": self.base_uri,
+            "consistent": self.consistent,
+            "missing": len(self.missing),
+            "owner_mismatches": len(self.owner_mismatches),
+            "uri_mismatches": len(self.uri_mismatches),
+            "extra": len(self.extra),
+            "sample": {
+                "missing": self.missing[:sample],
+                "owner_mismatches": self.owner_mismatches[:sample],
+                "uri_mismatches": sorted(self.uri_mismatches)[:sample],
+                "extra": self.extra[:sample],
+            },
+            "rpc_requests": self.rpc_requests,
+        }
+
+
+def _base_uri(pairs: List[Tuple[Optional[str], str]]) -> Optional[str]:
+    """
+    The prefix tokenURI() puts before minted URIs, from (on-chain, stored) pairs.
+
+    ERC721URIStorage returns _baseURI() + the minted URI and the contract has
+    no getter for the base, so it is the most common prefix left when a
+    token's on-chain URI ends with its stored one. None if no token shows it.
+    """
+    prefixes = Counter(
+        uri[:len(uri) - len(stored)]
+        for uri, stored in pairs if uri is not None and stored and uri.endswith(stored)
+    )
+    return prefixes.most_common(1)[0][0] if prefixes else None
+
+
+class Reconciler:
+    """
+    Audit nfts against ownerOf/tokenURI on chain and repair the differences.
+
+    tokenURI() is compared with the contract's base URI removed, so stored
+    URIs stay in the form NFTMinted carried and repairs write that form too.
+
+    Contract reads go out as batched eth_call requests pinned to the indexer's
+    checkpoint block, so a token indexed after the audit started is not
+    reported as a difference. Repairs replay the affected tokens' own mint and
+    transfer logs through the normal ingest handler.
+    """
+
+    def __init__(self, service, batch_size: int = settings.RECONCILE_BATCH_SIZE):
+        self.service = service
+        self.indexer = service.create_indexer()
+        self.batch_size = max(2, batch_size)
+
+    def _call(self, report: ReconcileReport, calls: list) -> list:
+        stats = {}
+        try:
+            return call_many(
+                self.service.session, self.service.contract, calls, report.block, self.batch_size, stats=stats
+            )
+        finally:
+            report.rpc_requests += stats.get("requests", 0)
+
+    def audit(self, block: Optional[int] = None) -> ReconcileReport:
+        """Compare every token on chain with its row, at block or the indexer checkpoint"""
+        if block is None:
+            block = self.indexer.load_checkpoint()
+        if block is None:
+            raise ValueError("Nothing has been indexed yet")
+
+        report = ReconcileReport(block=block, total_supply=0, current_token_id=0, db_count=0)
+        total_supply, current_token_id = self._call(report, [("totalSupply", []), ("getCurrentTokenId", [])])
+        if total_supply is None or current_token_id is None:
+            raise RPCCallError(f"totalSupply and getCurrentTokenId could not be read at block {block}")
+        report.total_supply, report.current_token_id = total_supply, current_token_id
+
+        db = SessionLocal()
+        try:
+            report.db_count = db.execute(select(func.count()).where(NFT.is_active == True)).scalar()
+            report.extra = list(db.execute(
+                select(NFT.token_id).where(NFT.token_id >= report.total_supply, NFT.is_active == True)
+                .order_by(NFT.token_id)
+            ).scalars())
+
+            # Every token costs two calls, ownerOf and tokenURI
+            page = self.batch_size // 2
+            for start in range(0, report.total_supply, page):
+                token_ids = range(start, min(start + page, report.total_supply))
+                chain = self._call(report, [(name, [token_id]) for token_id in token_ids
+                                            for name in ("ownerOf", "tokenURI")])
+                stored = {
+                    row.token_id: row for row in db.execute(
+                        select(NFT.token_id, NFT.owner_address, NFT.token_uri)
+                        .where(NFT.token_id.between(token_ids[0], token_ids[-1]), NFT.is_active == True)
+                    )
+                }
+                if report.base_uri is None:
+                    report.base_uri = _base_uri([
+                        (chain[2 * index + 1], stored[token_id].token_uri)
+                        for index, token_id in enumerate(token_ids) if token_id in stored
+                    ])
+                for index, token_id in enumerate(token_ids):
+                    owner, uri = chain[2 * index], chain[2 * index + 1]
+                    if owner is None:
+                        continue  # ownerOf reverts for tokens that do not exist
+                    row = stored.get(token_id)
+                    if row is None:
+                        report.missing.append(token_id)
+                        continue
+                    if normalize_address(owner) != row.owner_address:
+                        report.owner_mismatches.append(token_id)
+                    if uri is not None and report.base_uri and uri.startswith(report.base_uri):
+                        uri = uri[len(report.base_uri):]
+                    if uri is not None and uri != row.token_uri:
+                        report.uri_mismatches[token_id] = uri
+        finally:
+            db.close()
+        return report
+
+    def _first_block(self) -> int:
+        if settings.INDEXER_START_BLOCK >= 0:
+            return settings.INDEXER_START_BLOCK
+        return resolve_deploy_block(self.service.w3) or 0
+
+    def _topic(self, event_name: str) -> str:
+        for topic, event in self.indexer.events_by_topic.items():
+            if event.event_name == event_name:
+                return "0x" + topic.hex()
+        raise KeyError(event_name)
+
+    def _token_events(self, token_ids: List[int], to_block: int) -> List:
+        """Fetch the mint and transfer logs of specific tokens, by their indexed tokenId topic"""
+        minted, transfer = self._topic("NFTMinted"), self._topic("Transfer")
+        from_block = self._first_block()
+        events = []
+        for i in range(0, len(token_ids), settings.RECONCILE_LOG_TOKENS):
+            id_topics = ["0x" + format(token_id, "064x") for token_id in token_ids[i:i + settings.RECONCILE_LOG_TOKENS]]
+            events.extend(self.indexer.fetch_range(from_block, to_block, [minted, None, id_topics]))
+            events.extend(self.indexer.fetch_range(from_block, to_block, [transfer, None, None, id_topics]))
+        events.sort(key=lambda event: (event.blockNumber, event.logIndex))
+        return events
+
+    def repair(self, report: ReconcileReport) -> dict:
+        """Write missing tokens, owners and URIs found by an audit; new URIs get their metadata resolved again"""
+        token_ids = sorted(set(report.missing) | set(report.owner_mismatches))
+        events = self._token_events(token_ids, report.block) if token_ids else []
+
+        db = SessionLocal()
+        try:
+            if events:
+                self.indexer.handler(db, events)
+            # Replayed transfers already in nft_owners do not touch nfts again
+            resync_owners(db, token_ids)
+
+            if report.uri_mismatches:
+                rows = db.execute(select(NFT).where(NFT.token_id.in_(list(report.uri_mismatches)))).scalars()
+                bulk_insert_nfts(db, [
+                    NFTCreate(
+                        token_id=nft.token_id,
+                        owner_address=nft.owner_address,
+                        token_uri=report.uri_mismatches[nft.token_id],
+                        transaction_hash=nft.transaction_hash,
+                        block_number=nft.block_number,
+                        minted_at=nft.minted_at
+                    )
+                    for nft in rows
+                ], on_conflict="update")
+                # Metadata came from the old URI; the resolver refills rows without any
+                db.execute(
+                    update(NFT.__table__)
+                    .where(NFT.__table__.c.token_id.in_(list(report.uri_mismatches)))
+                    .values(metadata=None)
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        changed = token_ids + list(report.uri_mismatches)
+        if changed:
+            invalidate_nfts(changed)
+            invalidate_lists()
+        return {"events_replayed": len(events), "uris_updated": len(report.uri_mismatches)}
@@ -0,0 +1,127 @@
+"""
+JSON-RPC batch requests for reads web3 would otherwise send one at a time
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import requests
+from eth_abi import decode, encode
+from eth_utils import function_abi_to_4byte_selector
+from hexbytes import HexBytes
+
+from app.core.config import settings
+from app.core.metrics import RPC_REQUEST_DURATION, RPC_REQUESTS
+
+
+def rpc_batch(
+    session: requests.Session,
+    calls: Sequence[Tuple[str, list]],
+    rpc_url: str = settings.IRYS_RPC_URL
+) -> List[dict]:
+    """
+    Send (method, params) calls as one JSON-RPC batch request.
+
+    Returns the reply objects in call order; each holds "result" or "error".
+    Raises if the request as a whole fails or the endpoint rejects batches.
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+        for index, (method, params) in enumerate(calls)
+    ]
+    # Metrics label batches by their first method, e.g. "eth_call[batch]"
+    label = f"{calls[0][0]}[batch]" if calls else "[batch]"
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = session.post(
+            rpc_url, json=payload,
+            timeout=(settings.RPC_CONNECT_TIMEOUT, settings.RPC_READ_TIMEOUT)
+        )
+        response.raise_for_status()
+        replies = response.json()
+        if not isinstance(replies, list):
+            raise ValueError(f"Batch request rejected: {replies.get('error')}")
+
+        by_id = {reply.get("id"): reply for reply in replies}
+        ordered = [by_id.get(index) or {"error": {"message": "missing from batch reply"}} for index in range(len(calls))]
+        status = "ok"
+        return ordered
+    finally:
+        RPC_REQUEST_DURATION.labels(label).observe(time.perf_counter() - started)
+        RPC_REQUESTS.labels(label, status).inc()
+
+
+class RPCCallError(Exception):
+    """A call failed with a JSON-RPC error other than a revert, after retries"""
+
+
+def is_revert(error: dict) -> bool:
+    """Whether a JSON-RPC error reply is the call reverting, as opposed to the node failing"""
+    # Geth reports reverts with code 3; other clients use -32000 and say so in the message
+    return error.get("code") == 3 or "revert" in str(error.get("message", "")).lower()
+
+
+def call_many(
+    session: requests.Session,
+    contract,
+    calls: Sequence[Tuple[str, list]],
+    block: Union[int, str] = "latest",
+    batch_size: int = settings.RECONCILE_BATCH_SIZE,
+    rpc_url: str = settings.IRYS_RPC_URL,
+    stats: Optional[Dict[str, int]] = None
+) -> List[Optional[Any]]:
+    """
+    Run (function name, args) view calls on a contract with batched eth_call.
+
+    Calls are sent batch_size per HTTP request, all at the same block.
+    Single-output functions return their value and calls that revert return
+    None. Other errors (rate limits, node faults, replies missing from a
+    batch) are retried with backoff and raise RPCCallError if they persist.
+    stats["requests"] counts the HTTP requests sent, retries included.
+    """
+    block_tag = hex(block) if isinstance(block, int) else block
+    # Function name -> (selector, input types, output types), looked up once per function
+    functions = {}
+    rpc_calls = []
+    output_types = []
+    for name, args in calls:
+        if name not in functions:
+            abi = contract.get_function_by_name(name).abi
+            functions[name] = (
+                function_abi_to_4byte_selector(abi),
+                [item["type"] for item in abi["inputs"]],
+                [item["type"] for item in abi["outputs"]],
+            )
+        selector, input_types, types = functions[name]
+        data = "0x" + (selector + encode(input_types, args)).hex()
+        rpc_calls.append(("eth_call", [{"to": contract.address, "data": data}, block_tag]))
+        output_types.append(types)
+
+    results: List[Optional[Any]] = [None] * len(rpc_calls)
+    batch_size = max(1, batch_size)
+    for i in range(0, len(rpc_calls), batch_size):
+        pending = list(range(i, min(i + batch_size, len(rpc_calls))))
+        attempt = 0
+        while pending:
+            replies = rpc_batch(session, [rpc_calls[index] for index in pending], rpc_url)
+            if stats is not None:
+                stats["requests"] = stats.get("requests", 0) + 1
+            failed = []
+            for index, reply in zip(pending, replies):
+                error = reply.get("error")
+                if error is not None and not is_revert(error):
+                    failed.append((index, error))
+                elif reply.get("result") not in (None, "0x"):
+                    values = decode(output_types[index], HexBytes(reply["result"]))
+                    results[index] = values[0] if len(values) == 1 else values
+            if failed and attempt >= settings.RPC_CALL_RETRIES:
+                raise RPCCallError(
+                    f"{len(failed)} of {len(pending)} eth_call requests at block {block_tag} "
+                    f"failed after {attempt + 1} attempts: {failed[0][1].get('message')}"
+                )
+            pending = [index for index, _ in failed]
+            if pending:
+                time.sleep(settings.RPC_RETRY_BACKOFF * 2 ** attempt)
+                attempt += 1
+    return results
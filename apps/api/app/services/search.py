@@ -0,0 +1,72 @@
+"""
+Search over NFT metadata name, description and attribute values
+"""
+
+from typing import Tuple
+
+from sqlalchemy import Float, Text, and_, case, cast, func, literal, literal_column, or_
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement, Label
+
+from app.models.nft import NFT
+
+# Must match the configuration the search_vector column is generated with
+TEXT_SEARCH_CONFIG = "simple"
+
+
+def _postgresql_search(query: str) -> Tuple[ColumnElement, ColumnElement]:
+    vector = literal_column("nfts.search_vector", TSVECTOR)
+    document = literal_column("nfts.search_text")
+    tsquery = func.websearch_to_tsquery(cast(TEXT_SEARCH_CONFIG, REGCONFIG), query)
+    # Whole words through the tsvector index, misspellings and partial words
+    # through the trigram index (<% is word similarity above pg_trgm's threshold)
+    match = or_(vector.op("@@")(tsquery), literal(query).op("<%")(document))
+    rank = func.ts_rank(vector, tsquery) + func.word_similarity(query, document)
+    return match, rank
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _metadata_text(path: str) -> ColumnElement:
+    return func.coalesce(func.json_extract(NFT.metadata_, path, type_=Text), "")
+
+
+def _portable_search(query: str) -> Tuple[ColumnElement, ColumnElement]:
+    """Unindexed substring match for SQLite and other development databases"""
+    name = func.lower(_metadata_text("$.name"), type_=Text)
+    document = func.lower(
+        _metadata_text("$.name") + " " + _metadata_text("$.description") + " " + _metadata_text("$.attributes"),
+        type_=Text
+    )
+    # Longest terms first, as they reject the most rows; a LIKE over the raw
+    # JSON text rules rows out before the per-field extraction. Stored JSON
+    # escapes quotes, backslashes and non-ASCII, so only plain terms use it.
+    terms = sorted(query.split(), key=len, reverse=True)
+    raw = func.lower(cast(NFT.metadata_, Text))
+    match = and_(
+        *(raw.like(_like_pattern(term), escape="\\") for term in terms
+          if term.isascii() and '"' not in term and "\\" not in term),
+        *(document.like(_like_pattern(term), escape="\\") for term in terms)
+    )
+    rank = case((name.like(_like_pattern(query), escape="\\"), 1.0), else_=0.5)
+    return match, rank
+
+
+def search_filter(db: Session, query: str) -> Tuple[ColumnElement, Label]:
+    """
+    Match condition and relevance of NFTs for a search query.
+
+    On PostgreSQL the query is read like a web search box ("quoted phrases",
+    or, -excluded) against the generated search_vector and ranked by
+    ts_rank plus trigram word similarity. The rank is a double precision
+    label, so it round-trips exactly through a pagination cursor.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        match, rank = _postgresql_search(query)
+    else:
+        match, rank = _portable_search(query)
+    return match, cast(rank, Float).label("rank")
@@ -0,0 +1,77 @@
+"""
+Daily mint statistics and their incrementally maintained rollup
+"""
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.orm import Session
+from app.database import dialect_insert
+from app.models.nft import NFT, NFTDailyStat
+
+
+def utc_day(value: datetime) -> date:
+    """Get the UTC calendar day of a timestamp; naive values are taken as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _day_column(db: Session):
+    """SQL expression for the UTC calendar day of NFT.minted_at"""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(NFT.minted_at)
+    return cast(func.date_trunc("day", func.timezone("UTC", NFT.minted_at)), Date)
+
+
+def compute_daily_counts(db: Session, since: Optional[date] = None) -> Dict[date, int]:
+    """Count active NFTs per UTC day with a single GROUP BY query"""
+    day = _day_column(db)
+    query = select(day.label("day"), func.count().label("count")).where(NFT.is_active == True)
+    if since is not None:
+        query = query.where(NFT.minted_at >= datetime.combine(since, datetime.min.time(), tzinfo=timezone.utc))
+
+    counts = {}
+    for row in db.execute(query.group_by(day)):
+        value = row.day if isinstance(row.day, date) else date.fromisoformat(row.day)
+        counts[value] = row.count
+    return counts
+
+
+def add_daily_counts(db: Session, counts: Dict[date, int]):
+    """Add (or subtract) per-day counts in the rollup within the caller's transaction"""
+    counts = {day: count for day, count in counts.items() if count}
+    if not counts:
+        return
+
+    table = NFTDailyStat.__table__
+    stmt = dialect_insert(db, table).values(
+        [{"day": day, "minted_count": count} for day, count in sorted(counts.items())]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day"],
+        set_={"minted_count": table.c.minted_count + stmt.excluded.minted_count}
+    )
+    db.execute(stmt)
+
+
+def increment_daily_stats(db: Session, minted_at: Iterable[datetime]):
+    """Count newly inserted mints into the rollup"""
+    add_daily_counts(db, Counter(utc_day(value) for value in minted_at if value is not None))
+
+
+def rebuild_daily_stats(db: Session):
+    """Recompute the whole rollup from the nfts table"""
+    db.execute(delete(NFTDailyStat))
+    add_daily_counts(db, compute_daily_counts(db))
+
+
+def ensure_daily_stats(db: Session):
+    """Build the rollup once for databases that predate it"""
+    has_rollup = db.execute(select(NFTDailyStat.day).limit(1)).first() is not None
+    has_nfts = db.execute(select(NFT.id).limit(1)).first() is not None
+    if has_nfts and not has_rollup:
+        rebuild_daily_stats(db)
+        db.commit()
@@ -0,0 +1,141 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Union
+
+import httpx
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTRACT_ADDRESS = "0xAf34062DdDfa12347b81A9d8EAFf1B24a8F25215"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(port: int, env: dict) -> subprocess.Popen:
+    """Run the API under uvicorn and wait until it reports ready"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health/ready", timeout=1).status_code == 200:
+                return process
+            time.sleep(0.2)
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("API did not start")
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None) -> dict:
+    """Latency percentiles in milliseconds, plus throughput when the wall time is known"""
+    latencies = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+    result = {
+        "requests": len(latencies),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+    if elapsed:
+        result["requests_per_s"] = round(len(latencies) / elapsed, 1)
+    return result
+
+
+async def measure(
+    url: Union[str, Callable[[random.Random], str]],
+    requests: int,
+    concurrency: int,
+    params: Optional[dict] = None,
+    seed: int = 0
+) -> dict:
+    """
+    Issue requests GETs with bounded concurrency and summarize their latency.
+
+    url may be a function of a seeded Random, to spread requests over
+    different tokens, owners or pages reproducibly.
+    """
+    rng = random.Random(seed)
+    urls = [url(rng) if callable(url) else url for _ in range(requests)]
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        async def one(target: str):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(target, params=params)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400 and response.status_code != 404:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(target) for target in urls))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed)
+    result["errors"] = errors
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_document(suite: str, parameters: dict, results: Dict[str, dict]) -> dict:
+    """Wrap results with what is needed to compare runs across commits"""
+    return {
+        "suite": suite,
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+
+
+def compare(previous: dict, current: dict) -> List[str]:
+    """Lines showing how every numeric result changed between two result documents"""
+    lines = [f"{'metric':<48}{'before':>14}{'after':>14}{'change':>10}"]
+    for scenario, metrics in current["results"].items():
+        for name, value in metrics.items():
+            before = previous.get("results", {}).get(scenario, {}).get(name)
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+                continue
+            change = f"{(value - before) / before * 100:+.1f}%" if before else "n/a"
+            lines.append(f"{scenario + '.' + name:<48}{before:>14,.1f}{value:>14,.1f}{change:>10}")
+    return lines
+
+
+def load_json(path: str) -> dict:
+    with open(path) as handle:
+        return json.load(handle)
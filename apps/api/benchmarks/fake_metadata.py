@@ -0,0 +1,97 @@
+"""
+Local HTTP stand-in for token metadata hosts and IPFS gateways
+
+GET /doc/<name> and the gateway path /ipfs/<name> return a metadata document
+named <name>. Scripted failures are encoded in the path:
+/status/<code>/<count>/<name> answers <code> to the first <count> requests
+and then serves the document, and /status/<code>/0/<name> fails every time.
+/text/<name> returns a body that is not JSON, and /large/<size>/<name> a
+document padded to <size> bytes. Every request is recorded with
+its Host header and arrival time so callers can check deduplication, retries
+and per-host spacing.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+
+class FakeMetadataHost:
+    """Request log and scripted failure counters shared by the handler threads"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        # (host, path, monotonic arrival time)
+        self.requests: List[Tuple[str, str, float]] = []
+        self.failures = Counter()
+
+    def hits(self, path: Optional[str] = None, host: Optional[str] = None) -> int:
+        with self.lock:
+            return sum(
+                1 for req_host, req_path, _ in self.requests
+                if (path is None or req_path == path) and (host is None or req_host == host)
+            )
+
+    def arrivals(self, host: str) -> List[float]:
+        with self.lock:
+            return sorted(at for req_host, _, at in self.requests if req_host == host)
+
+    def handle(self, path: str) -> Tuple[int, str, bytes]:
+        """Status, content type and body for a path"""
+        parts = path.strip("/").split("/")
+        if parts[0] in ("doc", "ipfs") and len(parts) == 2:
+            return 200, "application/json", self.document(parts[1])
+        if parts[0] == "text" and len(parts) == 2:
+            return 200, "text/plain", b"not a metadata document"
+        if parts[0] == "large" and len(parts) == 3:
+            return 200, "application/json", self.document(parts[2], size=int(parts[1]))
+        if parts[0] == "status" and len(parts) == 4:
+            code, count, name = int(parts[1]), int(parts[2]), parts[3]
+            with self.lock:
+                self.failures[path] += 1
+                failing = count == 0 or self.failures[path] <= count
+            if failing:
+                return code, "application/json", json.dumps({"error": code}).encode()
+            return 200, "application/json", self.document(name)
+        return 404, "application/json", b'{"error": "not found"}'
+
+    @staticmethod
+    def document(name: str, size: int = 0) -> bytes:
+        document = {"name": name, "description": f"Metadata {name}", "attributes": []}
+        body = json.dumps(document).encode()
+        if len(body) < size:
+            document["description"] += " " * (size - len(body))
+            body = json.dumps(document).encode()
+        return body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    host: FakeMetadataHost
+
+    def do_GET(self):
+        with self.host.lock:
+            self.host.requests.append((self.headers.get("Host", ""), self.path, time.monotonic()))
+        if self.host.latency:
+            time.sleep(self.host.latency)
+        status, content_type, payload = self.host.handle(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: FakeMetadataHost, address: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve metadata on a background thread; returns the running server"""
+    handler = type("FakeMetadataHandler", (_Handler,), {"host": host})
+    server = ThreadingHTTPServer((address, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
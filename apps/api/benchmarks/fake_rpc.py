@@ -0,0 +1,314 @@
+"""
+Local JSON-RPC stand-in for the IRYS execution RPC
+
+Serves eth_blockNumber, eth_getBlockByNumber, eth_getLogs and eth_call for
+the NFT contract, singly or in JSON-RPC batches. With mints_per_block/transfers_per_block set, every block
+carries deterministic NFTMinted and Transfer logs, so a chain of any size is
+available without storing it.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from eth_abi import encode
+from eth_utils import keccak
+
+NFT_MINTED_TOPIC = "0x" + keccak(text="NFTMinted(address,uint256,string)").hex()
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+ZERO_TOPIC = "0x" + "00" * 32
+
+
+def selector(signature: str) -> str:
+    return "0x" + keccak(text=signature)[:4].hex()
+
+
+def synthetic_address(index: int) -> str:
+    """Deterministic owner address for a synthetic wallet index"""
+    return "0x" + hashlib.sha256(f"owner:{index}".encode()).hexdigest()[:40]
+
+
+def _topic(value) -> str:
+    if isinstance(value, str):
+        return "0x" + "00" * 12 + value[2:].lower()
+    return "0x" + format(value, "064x")
+
+
+class FakeChain:
+    """
+    In-memory chain state served over JSON-RPC with configurable latency.
+
+    Blocks are implicit; a block's hash depends on its number and the fork it
+    was produced on, so fork() replaces the tip with a different branch.
+    """
+
+    def __init__(
+        self,
+        head: int = 1_000,
+        latency: float = 0.0,
+        chain_id: int = 1270,
+        contract: Optional[str] = None,
+        mints_per_block: int = 0,
+        transfers_per_block: int = 0,
+        owners: int = 10_000,
+        mint_price: int = 10**16,
+        base_uri: str = "https://api.eternalcalendar.com/metadata/"
+    ):
+        self.head = head
+        self.latency = latency
+        self.chain_id = chain_id
+        self.contract = contract.lower() if contract else None
+        self.mints_per_block = mints_per_block
+        self.transfers_per_block = transfers_per_block
+        self.owners = max(1, owners)
+        self.mint_price = mint_price
+        # ERC721URIStorage.tokenURI() prefixes the minted URI with the contract's
+        # _baseURI(), as the deployed contract does; NFTMinted carries it bare
+        self.base_uri = base_uri
+        # While failing_calls is positive, every fail_every-th eth_call is answered
+        # with a rate-limit error instead of a result, using one up
+        self.failing_calls = 0
+        self.fail_every = 3
+        # block number -> fork generation; blocks not listed are on the original chain
+        self.generations: Dict[int, int] = {}
+        self.generation = 0
+        # block number -> raw logs in that block, without positional fields
+        self.logs: Dict[int, List[Dict[str, Any]]] = {}
+        self.calls: Dict[str, int] = {}
+        self.http_requests = 0
+        # (block, fork generation) -> token ID -> owner, built on first ownerOf at that block
+        self._owners: Dict[tuple, Dict[int, str]] = {}
+        self.lock = threading.Lock()
+        self.methods: Dict[str, Callable[[List[Any]], Any]] = {
+            "eth_chainId": lambda params: hex(self.chain_id),
+            "net_version": lambda params: str(self.chain_id),
+            "eth_blockNumber": lambda params: hex(self.head),
+            "eth_getBlockByNumber": self.get_block_by_number,
+            "eth_getLogs": self.get_logs,
+            "eth_call": self.call,
+        }
+        self.calls_by_selector = {
+            selector("mintPrice()"): lambda args, block: encode(["uint256"], [self.mint_price]),
+            selector("totalSupply()"): lambda args, block: encode(["uint256"], [self.total_supply(block)]),
+            selector("getCurrentTokenId()"): lambda args, block: encode(["uint256"], [self.total_supply(block)]),
+            selector("ownerOf(uint256)"): lambda args, block: encode(["address"], [self.owner_of(int(args[:64], 16), block)]),
+            selector("tokenURI(uint256)"): lambda args, block: encode(["string"], [self.base_uri + self.token_uri(int(args[:64], 16))]),
+        }
+
+    def block_hash(self, number: int) -> str:
+        generation = self.generations.get(number, 0)
+        if not generation:
+            return "0x" + format(number, "064x")
+        return "0x" + hashlib.sha256(f"{number}:{generation}".encode()).hexdigest()
+
+    def mine(self, blocks: int = 1):
+        """Extend the current branch"""
+        with self.lock:
+            for _ in range(blocks):
+                self.head += 1
+                self.generations.pop(self.head, None)
+                self.logs.pop(self.head, None)
+                if self.generation:
+                    self.generations[self.head] = self.generation
+
+    def fork(self, depth: int, new_blocks: Optional[int] = None):
+        """
+        Replace the last depth blocks with a new branch of new_blocks blocks
+        (default depth); logs in the replaced blocks are dropped.
+        """
+        with self.lock:
+            self.generation += 1
+            first = self.head - depth + 1
+            for number in range(first, self.head + 1):
+                self.generations.pop(number, None)
+                self.logs.pop(number, None)
+            self.head = first - 1
+        self.mine(depth if new_blocks is None else new_blocks)
+
+    def add_log(self, block_number: int, address: str, topics: List[str], data: str = "0x"):
+        """Emit a log in a block on the current branch"""
+        with self.lock:
+            self.logs.setdefault(block_number, []).append({"address": address, "topics": topics, "data": data})
+
+    def add_event(self, block_number: int, address: str, event_abi: Dict[str, Any], **args: Any):
+        """ABI-encode a contract event and emit it as a log"""
+        from eth_utils import event_abi_to_log_topic
+
+        topics = ["0x" + event_abi_to_log_topic(event_abi).hex()]
+        data_types, data_values = [], []
+        for item in event_abi["inputs"]:
+            if item["indexed"]:
+                topics.append("0x" + encode([item["type"]], [args[item["name"]]]).hex())
+            else:
+                data_types.append(item["type"])
+                data_values.append(args[item["name"]])
+        self.add_log(block_number, address, topics, "0x" + encode(data_types, data_values).hex())
+
+    def get_block_by_number(self, params: List[Any]) -> Optional[Dict[str, Any]]:
+        tag = params[0]
+        number = self.head if tag in ("latest", "safe", "finalized") else int(tag, 16)
+        if number > self.head:
+            return None
+        return {
+            "number": hex(number),
+            "hash": self.block_hash(number),
+            "parentHash": self.block_hash(number - 1) if number > 0 else "0x" + "0" * 64,
+            "timestamp": hex(1_700_000_000 + number),
+            "transactions": [],
+        }
+
+    def total_supply(self, block: Optional[int] = None) -> int:
+        return (self.head if block is None else block) * self.mints_per_block
+
+    def owner_of(self, token_id: int, block: int) -> str:
+        """Owner of a token at a block, replaying the Transfer logs up to it"""
+        key = (block, self.generation)
+        owners = self._owners.get(key)
+        if owners is None:
+            owners = {}
+            for number in range(1, block + 1):
+                for log in self.synthetic_logs(number) + self.logs.get(number, []):
+                    if log["topics"][0] == TRANSFER_TOPIC and log["address"].lower() == self.contract:
+                        owners[int(log["topics"][3], 16)] = "0x" + log["topics"][2][-40:]
+            self._owners[key] = owners
+        if token_id not in owners:
+            raise ValueError("execution reverted: ERC721NonexistentToken")
+        return owners[token_id]
+
+    def token_uri(self, token_id: int) -> str:
+        return f"ipfs://bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi/{token_id}.json"
+
+    def synthetic_logs(self, number: int) -> List[Dict[str, Any]]:
+        """Deterministic contract logs of a block: its mints, then transfers of earlier tokens"""
+        if not self.contract or number < 1:
+            return []
+        logs = []
+        first_token = (number - 1) * self.mints_per_block
+        for token_id in range(first_token, first_token + self.mints_per_block):
+            owner = synthetic_address(token_id % self.owners)
+            logs.append({
+                "address": self.contract,
+                "topics": [NFT_MINTED_TOPIC, _topic(owner), _topic(token_id)],
+                "data": "0x" + encode(["string"], [self.token_uri(token_id)]).hex(),
+            })
+            logs.append({
+                "address": self.contract,
+                "topics": [TRANSFER_TOPIC, ZERO_TOPIC, _topic(owner), _topic(token_id)],
+                "data": "0x",
+            })
+        if first_token:
+            for j in range(self.transfers_per_block):
+                token_id = (number * 7919 + j * 104729) % first_token
+                receiver = synthetic_address((number + j) % self.owners)
+                logs.append({
+                    "address": self.contract,
+                    "topics": [TRANSFER_TOPIC, _topic(synthetic_address(token_id % self.owners)),
+                               _topic(receiver), _topic(token_id)],
+                    "data": "0x",
+                })
+        return logs
+
+    def call(self, params: List[Any]) -> str:
+        transaction = params[0]
+        data = transaction.get("data") or transaction.get("input") or "0x"
+        handler = self.calls_by_selector.get(data[:10])
+        if handler is None:
+            raise ValueError(f"execution reverted: unknown selector {data[:10]}")
+        tag = params[1] if len(params) > 1 else "latest"
+        block = self.head if tag in ("latest", "safe", "finalized", "pending") else min(int(tag, 16), self.head)
+        return "0x" + handler(data[10:], block).hex()
+
+    def get_logs(self, params: List[Any]) -> List[Dict[str, Any]]:
+        query = params[0] if params else {}
+        from_block = int(query.get("fromBlock", "0x0"), 16)
+        to_block = self.head if query.get("toBlock", "latest") == "latest" else int(query["toBlock"], 16)
+        address = query.get("address")
+        addresses = {a.lower() for a in ([address] if isinstance(address, str) else address or [])}
+        # One set of accepted values per topic position; None accepts anything
+        topic_filter = [
+            None if topics is None else {t.lower() for t in ([topics] if isinstance(topics, str) else topics)}
+            for topics in query.get("topics") or []
+        ]
+
+        with self.lock:
+            to_block = min(to_block, self.head)
+            stored = {number: list(logs) for number, logs in self.logs.items() if from_block <= number <= to_block}
+
+        results = []
+        for number in range(from_block, to_block + 1):
+            block_hash = self.block_hash(number)
+            for index, log in enumerate(self.synthetic_logs(number) + stored.get(number, [])):
+                if addresses and log["address"].lower() not in addresses:
+                    continue
+                if any(
+                    accepted is not None and (position >= len(log["topics"]) or log["topics"][position].lower() not in accepted)
+                    for position, accepted in enumerate(topic_filter)
+                ):
+                    continue
+                results.append({
+                    **log,
+                    "blockNumber": hex(number),
+                    "blockHash": block_hash,
+                    "transactionHash": "0x" + hashlib.sha256(f"{block_hash}:{index}".encode()).hexdigest(),
+                    "transactionIndex": hex(index),
+                    "logIndex": hex(index),
+                    "removed": False,
+                })
+        return results
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method")
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            failing = method == "eth_call" and self.failing_calls > 0 and self.calls[method] % self.fail_every == 0
+            if failing:
+                self.failing_calls -= 1
+        if failing:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32005, "message": "rate limit exceeded"}}
+        handler = self.methods.get(method)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32601, "message": f"method {method} not found"}}
+        try:
+            result = handler(request.get("params", []))
+        except ValueError as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    chain: FakeChain
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.chain.lock:
+            self.chain.http_requests += 1
+        # Latency is per HTTP round trip, so a batch pays it once
+        if self.chain.latency:
+            time.sleep(self.chain.latency)
+        if isinstance(body, list):
+            response = [self.chain.handle(item) for item in body]
+        else:
+            response = self.chain.handle(body)
+        payload = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(chain: FakeChain, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve a chain on a background thread; returns the running server"""
+    handler = type("FakeRPCHandler", (_Handler,), {"chain": chain})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,138 @@
+"""
+Load test: /api/nft/ latency while the event listener catches up on a slow RPC
+
+Runs the API twice against a local SQLite database and a slow fake RPC, first
+with the listener disabled and then with it backfilling from block 0, and
+reports request latency percentiles for both runs.
+
+Each request asks for a random page of 100, for all tokens or one of --owners
+owners, and the server-side list response cache is disabled
+(RESPONSE_CACHE_LIST_TTL=0) so every request reaches the database; pass
+--response-cache to measure with the cache on.
+
+    python benchmarks/listener_latency.py --rpc-latency 0.5 --requests 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from benchmarks.common import CONTRACT_ADDRESS, free_port, measure, start_api  # noqa: E402
+from benchmarks.fake_rpc import FakeChain, serve  # noqa: E402
+
+
+def owner(index: int) -> str:
+    return "0x" + f"{index:040x}"
+
+
+def seed_database(database_url: str, rows: int, owners: int):
+    """Create the schema and insert rows through the ingest path, spread over owners"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    script = (
+        "import asyncio\n"
+        "from app.database import init_db, SessionLocal\n"
+        "from app.models.nft import NFTCreate\n"
+        "from app.services.ingest import bulk_insert_nfts\n"
+        "asyncio.run(init_db())\n"
+        "db = SessionLocal()\n"
+        f"bulk_insert_nfts(db, [NFTCreate(token_id=i, owner_address='0x' + format(i % {owners}, '040x'), token_uri=f'ipfs://{{i}}',"
+        f" transaction_hash='0x' + '22' * 32, block_number=i) for i in range({rows})])\n"
+        "db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=API_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def page_url(rng: random.Random, base: str, args) -> str:
+    """A random page of all tokens, or of one owner's tokens, so requests differ"""
+    if rng.random() < 0.5:
+        return f"{base}?limit=100&skip={rng.randrange(0, max(1, args.rows - 100))}"
+    owned = args.rows // args.owners
+    return f"{base}?limit=100&owner_address={owner(rng.randrange(args.owners))}&skip={rng.randrange(max(1, owned))}"
+
+
+def run_phase(name: str, listener: bool, chain: FakeChain, rpc_url: str, args) -> dict:
+    workdir = tempfile.mkdtemp()
+    database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    seed_database(database_url, args.rows, args.owners)
+
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        IRYS_RPC_URL=rpc_url,
+        CONTRACT_ADDRESS=CONTRACT_ADDRESS if listener else "",
+        INDEXER_START_BLOCK="0",
+        INDEXER_MAX_CHUNK=str(args.chunk),
+        INDEXER_INITIAL_CHUNK=str(args.chunk),
+    )
+    if not args.response_cache:
+        env["RESPONSE_CACHE_LIST_TTL"] = "0"
+    get_logs = chain.calls.get("eth_getLogs", 0)
+    process = start_api(port, env)
+    try:
+        # The RPC client and listener start after the API is ready; wait for both
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and (
+            httpx.get(f"http://127.0.0.1:{port}/api/health/ready").json()["rpc_client"] != "ready"
+            or listener and chain.calls.get("eth_getLogs", 0) == get_logs
+        ):
+            time.sleep(0.1)
+        # Give the listener time to enter its catch-up loop
+        time.sleep(2 * args.rpc_latency + 0.5)
+        result = asyncio.run(measure(
+            lambda rng: page_url(rng, f"http://127.0.0.1:{port}/api/nft/", args), args.requests, args.concurrency
+        ))
+    finally:
+        process.terminate()
+        process.wait()
+    result["phase"] = name
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc-latency", type=float, default=0.5, help="seconds added to every RPC call")
+    parser.add_argument("--head", type=int, default=1_000_000, help="fake chain head block")
+    parser.add_argument("--chunk", type=int, default=100, help="indexer chunk size, keeps it catching up")
+    parser.add_argument("--rows", type=int, default=1000, help="NFT rows to seed")
+    parser.add_argument("--owners", type=int, default=20, help="owners the seeded rows are spread over")
+    parser.add_argument("--response-cache", action="store_true", help="keep the server-side list response cache on")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    chain = FakeChain(head=args.head, latency=args.rpc_latency)
+    server = serve(chain)
+    rpc_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        results = [
+            run_phase("idle listener", False, chain, rpc_url, args),
+            run_phase("catching up", True, chain, rpc_url, args),
+        ]
+    finally:
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps({"results": results, "rpc_calls": chain.calls}, indent=2))
+        return
+
+    print(f"{'phase':<16}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for result in results:
+        print(f"{result['phase']:<16}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}")
+    print(f"RPC calls served: {chain.calls}")
+
+
+if __name__ == "__main__":
+    main()
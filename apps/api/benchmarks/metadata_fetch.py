@@ -0,0 +1,162 @@
+"""
+Metadata resolver scenario: resolve token URIs against a local HTTP stand-in
+
+Runs MetadataResolver.resolve against two fake metadata hosts and checks
+that identical URIs are fetched once, 429 and 5xx answers are retried with
+backoff while 404 and non-JSON bodies fail at once and are logged, documents
+over METADATA_MAX_BYTES are rejected without a retry, data: URIs are decoded
+without a request, unsupported schemes are rejected, ipfs:// goes through
+the configured gateway, and requests to one host are spaced to the
+per-host rate without slowing the other host.
+
+    python benchmarks/metadata_fetch.py --host-rate 20
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import sys
+import time
+from urllib.parse import quote
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        raise SystemExit(message)
+
+
+class Records(logging.Handler):
+    """Keeps the messages logged by the resolver"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(record.getMessage())
+
+
+async def scenario(args):
+    from benchmarks.fake_metadata import FakeMetadataHost, serve
+
+    host = FakeMetadataHost(latency=args.latency)
+    first, second = serve(host), serve(host)
+    base = f"http://127.0.0.1:{first.server_address[1]}"
+    other = f"http://127.0.0.1:{second.server_address[1]}"
+    os.environ.update(
+        IPFS_GATEWAY=base,
+        METADATA_HOST_RATE=str(args.host_rate),
+        METADATA_MAX_RETRIES="3",
+        METADATA_RETRY_BACKOFF=str(args.backoff),
+        METADATA_MAX_BYTES=str(args.max_bytes),
+        CACHE_BACKEND="memory",
+    )
+
+    from app.services.metadata_resolver import MetadataResolver
+
+    records = Records()
+    logging.getLogger("app.services.metadata_resolver").addHandler(records)
+    resolver = MetadataResolver()
+    try:
+        # Deduplication: 60 tokens over 3 URIs cost 3 requests
+        tokens = [(token_id, f"{base}/doc/shared-{token_id % 3}") for token_id in range(60)]
+        resolved = await resolver.resolve(tokens)
+        check(len(resolved) == 60, f"dedup: resolved {len(resolved)} of 60 tokens")
+        check(host.hits() == 3, f"dedup: {host.hits()} requests for 3 distinct URIs")
+        check(resolved[4]["name"] == "shared-1", f"dedup: token 4 got {resolved[4]}")
+        print(f"dedup: 60 tokens, {host.hits()} requests")
+
+        # Retries: transient statuses succeed after backoff, permanent ones fail once
+        cases = {
+            100: ("/status/429/2/rate-limited", 3, True),
+            101: ("/status/503/1/unavailable", 2, True),
+            102: ("/status/500/0/broken", 4, False),  # the first try plus METADATA_MAX_RETRIES
+            103: ("/status/404/0/missing", 1, False),
+            104: ("/text/plain", 1, False),
+        }
+        started = time.perf_counter()
+        resolved = await resolver.resolve([(token_id, base + path) for token_id, (path, _, _) in cases.items()])
+        elapsed = time.perf_counter() - started
+        for token_id, (path, requests, ok) in cases.items():
+            check(host.hits(path) == requests, f"retries: {path} requested {host.hits(path)} times, wanted {requests}")
+            check((token_id in resolved) == ok, f"retries: {path} resolved={token_id in resolved}, wanted {ok}")
+            check((token_id in resolver.failed_until) != ok, f"retries: {path} not marked for a later retry")
+        failed = [path for path, _, ok in cases.values() if not ok]
+        check(all(any(base + path in message for message in records.messages) for path in failed),
+              f"retries: failures were not logged: {records.messages}")
+        # Three retries back off 1x, 2x and 4x the base delay, each jittered by at least half
+        check(elapsed >= args.backoff * 7 * 0.5, f"retries: finished in {elapsed:.2f}s, too soon for backoff")
+        print(f"retries: {', '.join(f'{path} x{host.hits(path)}' for path, _, _ in cases.values())} in {elapsed:.2f}s")
+
+        # Size cap: a document at the cap is read, one byte more fails without a retry
+        fits, too_large = f"/large/{args.max_bytes}/fits", f"/large/{args.max_bytes + 1}/too-large"
+        resolved = await resolver.resolve([(110, base + fits), (111, base + too_large)])
+        check(resolved.get(110, {}).get("name") == "fits", f"size cap: a {args.max_bytes}-byte document was rejected")
+        check(111 not in resolved and 111 in resolver.failed_until, "size cap: an oversized document was resolved")
+        check(host.hits(too_large) == 1, f"size cap: oversized document requested {host.hits(too_large)} times")
+        check(any("too large" in message for message in records.messages), "size cap: rejection was not logged")
+        print(f"size cap: {args.max_bytes} bytes read, {args.max_bytes + 1} rejected after one request")
+
+        # data: URIs are decoded locally; unsupported schemes never reach the network
+        document = {"name": "inline", "attributes": [{"trait_type": "Month", "value": "May"}]}
+        requests_before = host.hits()
+        resolved = await resolver.resolve([
+            (200, "data:application/json;base64," + base64.b64encode(json.dumps(document).encode()).decode()),
+            (201, "data:application/json," + quote(json.dumps(document))),
+            (202, "ar://tx-id"),
+            (203, "ftp://example.com/metadata.json"),
+            (204, "ipfs://gateway-doc"),
+        ])
+        check(resolved.get(200) == document and resolved.get(201) == document, f"data: got {resolved}")
+        check(202 not in resolved and 203 not in resolved, "schemes: unsupported URIs were resolved")
+        check(resolved.get(204, {}).get("name") == "gateway-doc", f"ipfs: got {resolved.get(204)}")
+        check(host.hits() == requests_before + 1 and host.hits("/ipfs/gateway-doc") == 1,
+              "schemes: only the ipfs:// URI should reach a host")
+        print("uris: data: decoded locally, ar:// and ftp:// rejected, ipfs:// via the gateway")
+
+        # Per-host spacing: one host is paced to the rate, the other is not held up by it
+        count = args.per_host
+        started = time.perf_counter()
+        resolved = await resolver.resolve(
+            [(300 + i, f"{base}/doc/paced-{i}") for i in range(count)]
+            + [(400 + i, f"{other}/doc/other-{i}") for i in range(count)]
+        )
+        elapsed = time.perf_counter() - started
+        check(len(resolved) == 2 * count, f"rate: resolved {len(resolved)} of {2 * count}")
+        interval = 1.0 / args.host_rate
+        for name, url in (("first", base), ("second", other)):
+            arrivals = host.arrivals(url.removeprefix("http://"))[-count:]
+            gaps = [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+            # Arrival times carry scheduling jitter; the average spacing must hold the rate
+            average = (arrivals[-1] - arrivals[0]) / (len(arrivals) - 1)
+            check(average >= interval * 0.9 and min(gaps) >= interval * 0.5,
+                  f"rate: {name} host saw requests {average * 1000:.0f}ms apart on average, "
+                  f"{min(gaps) * 1000:.0f}ms at least")
+        # Both hosts are paced in parallel, so the batch takes one host's worth of slots
+        check(elapsed < interval * count * 1.5, f"rate: {2 * count} requests over two hosts took {elapsed:.2f}s")
+        print(f"rate: {count} requests per host at {args.host_rate}/s, both hosts in {elapsed:.2f}s")
+    finally:
+        await resolver.client.aclose()
+        first.shutdown()
+        second.shutdown()
+    print("ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host-rate", type=float, default=20.0, help="METADATA_HOST_RATE, requests per second per host")
+    parser.add_argument("--backoff", type=float, default=0.05, help="METADATA_RETRY_BACKOFF, first retry delay")
+    parser.add_argument("--max-bytes", type=int, default=4096, help="METADATA_MAX_BYTES, the document size cap")
+    parser.add_argument("--per-host", type=int, default=10, help="requests sent to each host in the rate check")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each fake response takes")
+    asyncio.run(scenario(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
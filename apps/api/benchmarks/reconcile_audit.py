@@ -0,0 +1,164 @@
+"""
+Reconciliation scenario: damage an indexed database and audit it against the chain
+
+Indexes a synthetic collection from the local fake chain into a throwaway
+SQLite database, deletes some rows and corrupts owners and URIs of others,
+then checks that an audit finds exactly those tokens in a handful of batched
+RPC round trips and that a repair makes the next audit clean and leaves
+re-pointed tokens for the metadata resolver. Like the deployed contract,
+the fake chain's tokenURI() prefixes minted URIs with a base URI; some of
+its eth_call replies are rate-limit errors, which must be retried.
+
+    python benchmarks/reconcile_audit.py --tokens 10000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+CONTRACT_ADDRESS = "0xAf34062DdDfa12347b81A9d8EAFf1B24a8F25215"
+
+
+def damage(count: int) -> dict:
+    """Delete, reassign and re-point count tokens each; returns the token IDs touched"""
+    from sqlalchemy import delete, update
+
+    from app.database import SessionLocal
+    from app.models.nft import NFT
+
+    deleted = list(range(5, 5 + count * 37, 37))
+    # A deleted token is only reported missing, so keep the sets apart
+    owners = [token_id for token_id in range(11, 11 + count * 41, 41) if token_id not in deleted]
+    uris = [token_id for token_id in range(13, 13 + count * 43, 43) if token_id not in deleted]
+    db = SessionLocal()
+    try:
+        db.execute(delete(NFT).where(NFT.token_id.in_(deleted)))
+        db.execute(update(NFT).where(NFT.token_id.in_(owners)).values(owner_address="0x" + "ee" * 20))
+        db.execute(update(NFT).where(NFT.token_id.in_(uris)).values(
+            token_uri="ipfs://stale", metadata_={"name": "stale"}
+        ))
+        db.commit()
+    finally:
+        db.close()
+    return {"missing": deleted, "owner_mismatches": owners, "uri_mismatches": uris}
+
+
+def stale_metadata(token_ids: list) -> list:
+    """Tokens still holding metadata resolved from a URI the repair replaced"""
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.models.nft import NFT
+
+    db = SessionLocal()
+    try:
+        return list(db.execute(
+            select(NFT.token_id).where(NFT.token_id.in_(token_ids), NFT.metadata_.isnot(None))
+        ).scalars())
+    finally:
+        db.close()
+
+
+async def scenario(args):
+    from benchmarks.fake_rpc import FakeChain, serve
+
+    blocks = args.tokens // args.mints_per_block
+    chain = FakeChain(
+        head=blocks + 2, contract=CONTRACT_ADDRESS,
+        mints_per_block=args.mints_per_block, transfers_per_block=args.transfers_per_block
+    )
+    server = serve(chain)
+    workdir = tempfile.mkdtemp(prefix="reconcile-")
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'reconcile.db')}",
+        IRYS_RPC_URL=f"http://127.0.0.1:{server.server_address[1]}",
+        CONTRACT_ADDRESS=CONTRACT_ADDRESS,
+        RPC_RETRY_BACKOFF="0.05",
+        INDEXER_START_BLOCK="1",
+        INDEXER_CONFIRMATIONS="2",
+    )
+
+    from app.database import init_db
+    from app.services.blockchain import BlockchainService
+    from app.services.reconcile import Reconciler
+    from app.services.rpc_batch import RPCCallError
+
+    await init_db()
+    service = BlockchainService()
+    indexer = service.create_indexer()
+    next_block = indexer._start_block(blocks)
+    while next_block <= blocks:
+        next_block = await indexer.run_once(next_block, blocks)
+
+    reconciler = Reconciler(service, batch_size=args.batch_size)
+    clean = reconciler.audit()
+    if not clean.consistent:
+        raise SystemExit(f"freshly indexed database is not consistent: {clean.summary()}")
+    if clean.base_uri != chain.base_uri:
+        raise SystemExit(f"audit took {clean.base_uri!r} as the tokenURI base, wanted {chain.base_uri!r}")
+
+    expected = damage(args.damage)
+    # Rate-limited calls are retried, not mistaken for tokens that do not exist
+    chain.failing_calls = args.rpc_errors
+    requests_before = chain.http_requests
+    started = time.perf_counter()
+    report = reconciler.audit()
+    audit_seconds = time.perf_counter() - started
+    audit_requests = chain.http_requests - requests_before
+
+    found = {
+        "missing": report.missing,
+        "owner_mismatches": report.owner_mismatches,
+        "uri_mismatches": sorted(report.uri_mismatches),
+    }
+    print(f"audit of {report.total_supply} tokens at block {report.block}: "
+          f"{audit_requests} HTTP requests in {audit_seconds:.2f}s")
+    print({key: len(value) for key, value in found.items()})
+    if found != expected:
+        raise SystemExit(f"audit found {found}, wanted {expected}")
+    if report.rpc_requests != audit_requests:
+        raise SystemExit(f"report counted {report.rpc_requests} requests, server saw {audit_requests}")
+
+    requests_before = chain.http_requests
+    repaired = reconciler.repair(report)
+    print(f"repair: {repaired} in {chain.http_requests - requests_before} HTTP requests")
+    after = reconciler.audit()
+    stale = stale_metadata(expected["uri_mismatches"])
+
+    # An endpoint that keeps failing stops the audit instead of skipping tokens
+    chain.failing_calls = 10**9
+    try:
+        reconciler.audit()
+        raise SystemExit("audit passed with every eth_call failing")
+    except RPCCallError as e:
+        print(f"persistent RPC errors: {e}")
+    chain.failing_calls = 0
+
+    service.close()
+    server.shutdown()
+    if not after.consistent:
+        raise SystemExit(f"differences left after repair: {after.summary()}")
+    if stale:
+        raise SystemExit(f"metadata of the old URI kept after repair: {stale}")
+    print("ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=10_000)
+    parser.add_argument("--mints-per-block", type=int, default=10)
+    parser.add_argument("--transfers-per-block", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=2000, help="eth_call requests per JSON-RPC batch")
+    parser.add_argument("--rpc-errors", type=int, default=300, help="eth_calls answered with a rate-limit error during the audit")
+    parser.add_argument("--damage", type=int, default=25, help="tokens deleted, reassigned and re-pointed each")
+    asyncio.run(scenario(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Fork scenario: index mints and transfers, reorganize the tip and re-index
+
+Drives the event indexer against the local fake chain and a throwaway SQLite
+database, replaces the last blocks with a different branch and checks that
+orphaned mints, transfers and rollup counts are rolled back, and tokens go
+back to their owner before the fork, without scanning from the start block
+again.
+
+    python benchmarks/reorg_replay.py --depth 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+CONTRACT_ADDRESS = "0xAf34062DdDfa12347b81A9d8EAFf1B24a8F25215"
+ZERO_ADDRESS = "0x" + "00" * 20
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+CAROL = "0x" + "cc" * 20
+
+
+def configure(database_url: str, rpc_url: str, start_block: int, confirmations: int):
+    os.environ.update(
+        DATABASE_URL=database_url,
+        IRYS_RPC_URL=rpc_url,
+        CONTRACT_ADDRESS=CONTRACT_ADDRESS,
+        INDEXER_START_BLOCK=str(start_block),
+        INDEXER_CONFIRMATIONS=str(confirmations),
+        INDEXER_INITIAL_CHUNK="4",
+    )
+
+
+def mint(chain, abi, block: int, token_id: int, owner: str):
+    chain.add_event(block, CONTRACT_ADDRESS, abi["NFTMinted"], to=owner, tokenId=token_id, tokenURI=f"ipfs://{token_id}")
+    chain.add_event(block, CONTRACT_ADDRESS, abi["Transfer"], **{"from": ZERO_ADDRESS, "to": owner, "tokenId": token_id})
+
+
+def transfer(chain, abi, block: int, token_id: int, sender: str, receiver: str):
+    chain.add_event(block, CONTRACT_ADDRESS, abi["Transfer"], **{"from": sender, "to": receiver, "tokenId": token_id})
+
+
+def snapshot() -> dict:
+    from app.database import SessionLocal
+    from app.models.nft import NFT, NFTDailyStat, NFTOwner, NFTTransfer
+
+    db = SessionLocal()
+    try:
+        return {
+            "owners": {nft.token_id: nft.owner_address.lower() for nft in db.query(NFT).order_by(NFT.token_id)},
+            "current_owners": {
+                owner.token_id: owner.owner_address.lower() for owner in db.query(NFTOwner).order_by(NFTOwner.token_id)
+            },
+            "transfers": db.query(NFTTransfer).count(),
+            "rollup": sum(stat.minted_count for stat in db.query(NFTDailyStat)),
+        }
+    finally:
+        db.close()
+
+
+async def catch_up(indexer, chain) -> int:
+    """Index to the confirmed head; returns the number of get_logs calls made"""
+    before = chain.calls.get("eth_getLogs", 0)
+    head = chain.head - indexer.confirmations
+    next_block = indexer._start_block(head)
+    while next_block <= head:
+        next_block = await indexer.run_once(next_block, head)
+    return chain.calls.get("eth_getLogs", 0) - before
+
+
+async def scenario(args):
+    from benchmarks.fake_rpc import FakeChain, serve
+
+    chain = FakeChain(head=args.start + 20)
+    server = serve(chain)
+    workdir = tempfile.mkdtemp(prefix="reorg-")
+    configure(
+        f"sqlite:///{os.path.join(workdir, 'reorg.db')}",
+        f"http://127.0.0.1:{server.server_address[1]}",
+        args.start, args.confirmations
+    )
+
+    from app.database import init_db
+    from app.services.blockchain import BlockchainService
+
+    await init_db()
+    service = BlockchainService()
+    abi = {item["name"]: item for item in service.contract_abi if item["type"] == "event"}
+    indexer = service.create_indexer()
+
+    tip = chain.head - args.confirmations
+    mint(chain, abi, args.start + 2, 1, ALICE)
+    mint(chain, abi, tip - args.depth + 1, 2, ALICE)
+    mint(chain, abi, args.start + 3, 3, ALICE)
+    # Token 4's mint emitted no Transfer, so it has no history before the fork
+    chain.add_event(args.start + 3, CONTRACT_ADDRESS, abi["NFTMinted"], to=ALICE, tokenId=4, tokenURI="ipfs://4")
+    transfer(chain, abi, tip, 1, ALICE, BOB)
+    transfer(chain, abi, tip, 3, ALICE, BOB)
+    transfer(chain, abi, tip - 1, 4, ALICE, BOB)
+    await catch_up(indexer, chain)
+    before = snapshot()
+
+    # The last depth confirmed blocks are replaced by a longer branch where
+    # token 2 is never minted, token 1 goes to Carol instead and tokens 3
+    # and 4 stay with Alice
+    replaced = args.depth + args.confirmations
+    chain.fork(replaced, new_blocks=replaced + 1)
+    transfer(chain, abi, tip - 1, 1, ALICE, CAROL)
+    rescanned = await catch_up(indexer, chain)
+    after = snapshot()
+
+    service.close()
+    server.shutdown()
+
+    print(f"before reorg: {before}")
+    print(f"after reorg:  {after} ({rescanned} eth_getLogs calls to recover)")
+    owners = {1: CAROL, 3: ALICE, 4: ALICE}
+    expected = {"owners": owners, "current_owners": owners, "transfers": 3, "rollup": 3}
+    if after != expected:
+        raise SystemExit(f"unexpected state after reorg, wanted {expected}")
+    print("ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=int, default=100, help="first indexed block")
+    parser.add_argument("--depth", type=int, default=4, help="confirmed blocks replaced by the fork")
+    parser.add_argument("--confirmations", type=int, default=2)
+    asyncio.run(scenario(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
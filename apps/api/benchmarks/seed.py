@@ -0,0 +1,140 @@
+"""
+Data generator: seed a database with synthetic NFTs for benchmarks
+
+Rows are deterministic for a given --seed. Owners follow a skewed
+distribution (a few wallets hold many tokens), mint times are spread over
+--days, and --metadata-ratio of the tokens carry attribute metadata. The
+current-owner table and the daily rollup are filled to match.
+
+    python benchmarks/seed.py --database-url sqlite:////tmp/bench.db --rows 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from benchmarks.fake_rpc import synthetic_address  # noqa: E402
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+ELEMENTS = ["Fire", "Water", "Earth", "Air", "Aether"]
+
+
+def generate(rows: int, owners: int, days: int, metadata_ratio: float, seed: int):
+    """Yield (nft, owner) row dicts in token order"""
+    rng = random.Random(seed)
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(days=days)
+    span_seconds = days * 86400
+    addresses = [synthetic_address(index) for index in range(owners)]
+
+    for token_id in range(rows):
+        # Squaring a uniform draw skews ownership toward low wallet indexes
+        owner = addresses[int(owners * rng.random() ** 2)]
+        minted_at = start + timedelta(seconds=span_seconds * token_id // max(1, rows))
+        block_number = token_id // 2 + 1
+        metadata = None
+        if rng.random() < metadata_ratio:
+            metadata = {
+                "name": f"Eternal Calendar #{token_id}",
+                "description": f"{MONTHS[minted_at.month - 1]} {minted_at.day}",
+                "attributes": [
+                    {"trait_type": "Month", "value": MONTHS[minted_at.month - 1]},
+                    {"trait_type": "Element", "value": rng.choice(ELEMENTS)},
+                    {"trait_type": "Rarity", "value": rng.choice(["Common"] * 6 + ["Rare"] * 3 + ["Legendary"])},
+                ],
+            }
+        yield (
+            {
+                "token_id": token_id,
+                "owner_address": owner,
+                "token_uri": f"ipfs://bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi/{token_id}.json",
+                "metadata": metadata,
+                "minted_at": minted_at,
+                "updated_at": minted_at,
+                "transaction_hash": "0x" + format(token_id, "064x"),
+                "block_number": block_number,
+                "is_active": True,
+            },
+            {
+                "token_id": token_id,
+                "owner_address": owner,
+                "block_number": block_number,
+                "log_index": 1,
+                "updated_at": minted_at,
+            },
+        )
+
+
+def seed(rows: int, owners: int, days: int, metadata_ratio: float, batch_size: int, seed_value: int) -> dict:
+    """Create the schema and bulk-load rows; returns timing for the load"""
+    import asyncio
+
+    from sqlalchemy import insert
+
+    from app.database import SessionLocal, engine, init_db
+    from app.models.nft import NFT, NFTOwner
+    from app.services.stats import rebuild_daily_stats
+
+    asyncio.run(init_db())
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        nfts, owned = [], []
+        for nft, owner in generate(rows, owners, days, metadata_ratio, seed_value):
+            nfts.append(nft)
+            owned.append(owner)
+            if len(nfts) >= batch_size:
+                db.execute(insert(NFT.__table__), nfts)
+                db.execute(insert(NFTOwner.__table__), owned)
+                nfts, owned = [], []
+        if nfts:
+            db.execute(insert(NFT.__table__), nfts)
+            db.execute(insert(NFTOwner.__table__), owned)
+        loaded = time.perf_counter() - started
+
+        rebuild_daily_stats(db)
+        db.commit()
+    finally:
+        db.close()
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "owners": owners,
+        "load_s": round(loaded, 2),
+        "total_s": round(elapsed, 2),
+        "rows_per_s": round(rows / loaded) if loaded else None,
+        "dialect": engine.dialect.name,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--metadata-ratio", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Settings are read at import time, so the URL must be in place before the app is imported
+    os.environ["DATABASE_URL"] = args.database_url
+    result = seed(args.rows, args.owners, args.days, args.metadata_ratio, args.batch_size, args.seed)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Startup scenario: run the application lifespan end to end and shut it down
+
+Starts the real FastAPI lifespan against the local fake chain and a throwaway
+SQLite database, then checks that the process becomes ready, wins the indexer
+election, starts the event listener and metadata resolver (a token with a
+data: URI gets its metadata filled), and shuts down without errors.
+
+    python benchmarks/startup_check.py
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+CONTRACT_ADDRESS = "0xAf34062DdDfa12347b81A9d8EAFf1B24a8F25215"
+DOCUMENT = {"name": "Eternal Calendar #1", "description": "January 1", "attributes": []}
+
+
+def insert_unresolved_token():
+    """One token without metadata whose URI the resolver can read offline"""
+    from app.database import SessionLocal
+    from app.models.nft import NFTCreate
+    from app.services.ingest import bulk_insert_nfts
+
+    uri = "data:application/json;base64," + base64.b64encode(json.dumps(DOCUMENT).encode()).decode()
+    db = SessionLocal()
+    try:
+        bulk_insert_nfts(db, [NFTCreate(
+            token_id=1, owner_address="0x" + "aa" * 20, token_uri=uri,
+            transaction_hash="0x" + "11" * 32, block_number=1
+        )])
+        db.commit()
+    finally:
+        db.close()
+
+
+def stored_metadata():
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.models.nft import NFT
+
+    db = SessionLocal()
+    try:
+        return db.execute(select(NFT.metadata_).where(NFT.token_id == 1)).scalar()
+    finally:
+        db.close()
+
+
+async def wait_for(condition, timeout: float, what: str):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise SystemExit(f"timed out waiting for {what}")
+        await asyncio.sleep(0.1)
+
+
+async def scenario(args):
+    from benchmarks.fake_rpc import FakeChain, serve
+
+    chain = FakeChain(head=50, contract=CONTRACT_ADDRESS)
+    server = serve(chain)
+    workdir = tempfile.mkdtemp(prefix="startup-")
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        IRYS_RPC_URL=f"http://127.0.0.1:{server.server_address[1]}",
+        CONTRACT_ADDRESS=CONTRACT_ADDRESS,
+        INDEXER_START_BLOCK="1",
+        LEADER_CHECK_INTERVAL="0.2",
+        METADATA_POLL_INTERVAL="0.2",
+        METADATA_RESOLVER_ENABLED="true",
+    )
+
+    from app.database import init_db
+
+    await init_db()
+    insert_unresolved_token()
+
+    from main import app, lifespan
+
+    started = time.perf_counter()
+    async with lifespan(app):
+        await wait_for(lambda: app.state.ready, args.timeout, "readiness")
+        print(f"ready after {time.perf_counter() - started:.2f}s")
+        await wait_for(lambda: chain.calls.get("eth_getLogs", 0) > 0, args.timeout, "the event listener")
+        await wait_for(lambda: stored_metadata() is not None, args.timeout, "the metadata resolver")
+        print(f"listener and resolver running after {time.perf_counter() - started:.2f}s")
+    server.shutdown()
+
+    if stored_metadata() != DOCUMENT:
+        raise SystemExit(f"resolver stored {stored_metadata()}, wanted {DOCUMENT}")
+    print("ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for each stage")
+    asyncio.run(scenario(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmark suite: backfill throughput, endpoint latency and stats aggregation cost
+
+Everything runs offline against the local fake chain and a seeded database
+(SQLite in a temporary directory unless --database-url points at Postgres).
+Results are written as JSON so runs can be compared across commits:
+
+    python benchmarks/suite.py --rows 1000000 --output before.json
+    git checkout <change> && python benchmarks/suite.py --rows 1000000 --compare before.json
+
+Scenarios:
+    backfill   index a synthetic chain of NFTMinted/Transfer logs from scratch
+    parallel   the sharded backfill command at each --parallel-workers count
+    endpoints  latency and throughput of list, owner, token, search and stats endpoints under concurrent load
+    stats      cost of the full GROUP BY versus reading the daily rollup
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from benchmarks.common import (  # noqa: E402
+    CONTRACT_ADDRESS, compare, free_port, load_json, measure, result_document, start_api
+)
+from benchmarks.fake_rpc import FakeChain, serve, synthetic_address  # noqa: E402
+from benchmarks.seed import ELEMENTS, MONTHS  # noqa: E402
+
+SCENARIOS = ("backfill", "parallel", "endpoints", "stats")
+
+
+def run_worker(scenario: str, env: dict, args) -> dict:
+    """Run a scenario that imports the app in its own process, so it gets its own settings"""
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", scenario,
+         "--repeat", str(args.repeat), "--blocks", str(args.blocks)],
+        cwd=API_DIR, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"{scenario} worker failed:\n{process.stderr[-4000:]}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def seed_database(database_url: str, args) -> dict:
+    process = subprocess.run(
+        [sys.executable, os.path.join(API_DIR, "benchmarks", "seed.py"), "--database-url", database_url,
+         "--rows", str(args.rows), "--owners", str(args.owners), "--seed", str(args.seed)],
+        cwd=API_DIR, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"seeding failed:\n{process.stderr[-4000:]}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def base_env(database_url: str, **overrides) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        CONTRACT_ADDRESS="",
+        METADATA_RESOLVER_ENABLED="false",
+        LOG_LEVEL="WARNING",
+    )
+    env.update(overrides)
+    return env
+
+
+def scenario_backfill(args, workdir: str) -> dict:
+    """Index --blocks blocks of synthetic mints and transfers into an empty database"""
+    chain = FakeChain(
+        head=args.blocks, latency=args.rpc_latency, contract=CONTRACT_ADDRESS,
+        mints_per_block=args.mints_per_block, transfers_per_block=args.transfers_per_block,
+        owners=args.owners
+    )
+    server = serve(chain)
+    database_url = args.backfill_database_url or f"sqlite:///{os.path.join(workdir, 'backfill.db')}"
+    try:
+        result = run_worker("backfill", base_env(
+            database_url,
+            IRYS_RPC_URL=f"http://127.0.0.1:{server.server_address[1]}",
+            CONTRACT_ADDRESS=CONTRACT_ADDRESS,
+            INDEXER_START_BLOCK="1",
+            INDEXER_CONFIRMATIONS="0",
+        ), args)
+    finally:
+        server.shutdown()
+    result["rpc_calls"] = sum(chain.calls.values())
+    result["rpc_get_logs_calls"] = chain.calls.get("eth_getLogs", 0)
+    return result
+
+
+def scenario_parallel(args, workdir: str) -> dict:
+    """Throughput of `python -m app.cli backfill` over the same chain as worker count grows"""
+    chain = FakeChain(
+        head=args.blocks, latency=args.rpc_latency, contract=CONTRACT_ADDRESS,
+        mints_per_block=args.mints_per_block, transfers_per_block=args.transfers_per_block,
+        owners=args.owners
+    )
+    server = serve(chain)
+    results = {}
+    try:
+        for workers in (int(count) for count in args.parallel_workers.split(",")):
+            env = base_env(
+                f"sqlite:///{os.path.join(workdir, f'parallel-{workers}.db')}",
+                IRYS_RPC_URL=f"http://127.0.0.1:{server.server_address[1]}",
+                CONTRACT_ADDRESS=CONTRACT_ADDRESS,
+                INDEXER_CONFIRMATIONS="0",
+            )
+            process = subprocess.run(
+                [sys.executable, "-m", "app.cli", "backfill", "--from-block", "1", "--workers", str(workers),
+                 "--shard-size", str(max(1, args.blocks // 20))],
+                cwd=API_DIR, env=env, capture_output=True, text=True
+            )
+            if process.returncode != 0:
+                raise RuntimeError(f"parallel backfill failed:\n{process.stderr[-4000:]}")
+            summary = json.loads(process.stdout.strip().splitlines()[-1])
+            results[f"workers_{workers}"] = {key: summary[key] for key in ("elapsed_s", "blocks_per_s", "events")}
+    finally:
+        server.shutdown()
+    return results
+
+
+def scenario_endpoints(args, database_url: str) -> dict:
+    """Latency of the read endpoints against the seeded database"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    process = start_api(port, base_env(database_url))
+    owners = [synthetic_address(index) for index in range(args.owners)]
+    cases = {
+        "list_first_page": lambda rng: f"{base}/api/nft/?limit=100",
+        "list_offset_page": lambda rng: f"{base}/api/nft/?limit=100&skip={rng.randrange(0, min(args.rows, 10_000))}",
+        # Full pages: distinct offsets miss the response cache, the repeated page hits it
+        "list_page_1000": lambda rng: f"{base}/api/nft/?limit=1000&skip={rng.randrange(0, min(args.rows, 20_000))}",
+        "list_page_1000_cached": lambda rng: f"{base}/api/nft/?limit=1000",
+        "minted_page_1000": lambda rng: f"{base}/api/events/minted?limit=1000&skip={rng.randrange(0, min(args.rows, 20_000))}",
+        "owner": lambda rng: f"{base}/api/nft/owner/{rng.choice(owners)}?limit=50",
+        "token": lambda rng: f"{base}/api/nft/{rng.randrange(args.rows)}",
+        "trait_filter": lambda rng: f"{base}/api/nft/?trait_type=Rarity&trait_value=Legendary&limit=50",
+        # Distinct queries miss the response cache; seeded metadata names months and elements
+        "search": lambda rng: f"{base}/api/nft/search?q={rng.choice(MONTHS)}+{rng.randrange(1, 29)}&limit=50",
+        "search_trait_words": lambda rng: f"{base}/api/nft/search?q=legendary+{rng.choice(ELEMENTS)}&limit=50",
+        "event_stats": lambda rng: f"{base}/api/events/stats",
+    }
+    results = {}
+    try:
+        for name, url in cases.items():
+            # One warm-up pass so the first case doesn't pay for connection setup
+            asyncio.run(measure(url, min(20, args.requests), args.concurrency, seed=args.seed + 1))
+            results[name] = asyncio.run(measure(url, args.requests, args.concurrency, seed=args.seed))
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def scenario_stats(args, database_url: str) -> dict:
+    return run_worker("stats", base_env(database_url), args)
+
+
+def worker_backfill(args) -> dict:
+    from app.database import SessionLocal, init_db
+    from app.models.nft import NFT, NFTTransfer
+    from app.services.blockchain import BlockchainService
+
+    async def backfill():
+        await init_db()
+        service = BlockchainService()
+        indexer = service.create_indexer()
+        started = time.perf_counter()
+        next_block = indexer._start_block(args.blocks)
+        while next_block <= args.blocks:
+            next_block = await indexer.run_once(next_block, args.blocks)
+        elapsed = time.perf_counter() - started
+        service.close()
+        return elapsed, indexer.chunker.size
+
+    elapsed, chunk_size = asyncio.run(backfill())
+    db = SessionLocal()
+    try:
+        nfts = db.query(NFT).count()
+        transfers = db.query(NFTTransfer).count()
+    finally:
+        db.close()
+    return {
+        "blocks": args.blocks,
+        "elapsed_s": round(elapsed, 3),
+        "blocks_per_s": round(args.blocks / elapsed, 1),
+        # Every mint also emits a Transfer from the zero address
+        "events_per_s": round((nfts + transfers) / elapsed, 1),
+        "nfts": nfts,
+        "transfers": transfers,
+        "final_chunk_size": chunk_size,
+    }
+
+
+def worker_stats(args) -> dict:
+    from app.database import SessionLocal
+    from app.models.nft import NFTDailyStat
+    from app.services.stats import compute_daily_counts, rebuild_daily_stats
+
+    def timed(func) -> float:
+        samples = []
+        for _ in range(args.repeat):
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                func(db)
+                samples.append(time.perf_counter() - started)
+                db.rollback()
+            finally:
+                db.close()
+        samples.sort()
+        return round(samples[len(samples) // 2] * 1000, 3)
+
+    return {
+        "group_by_full_scan_ms": timed(lambda db: compute_daily_counts(db)),
+        "rollup_read_ms": timed(lambda db: db.query(NFTDailyStat.day, NFTDailyStat.minted_count).all()),
+        "rollup_rebuild_ms": timed(rebuild_daily_stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--database-url", help="seed and query this database instead of a temporary SQLite file")
+    parser.add_argument("--backfill-database-url", help="empty database for the backfill scenario")
+    parser.add_argument("--rows", type=int, default=100_000, help="NFT rows to seed")
+    parser.add_argument("--owners", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--blocks", type=int, default=5_000, help="chain size for the backfill scenario")
+    parser.add_argument("--mints-per-block", type=int, default=2)
+    parser.add_argument("--transfers-per-block", type=int, default=1)
+    parser.add_argument("--parallel-workers", default="1,2,4", help="worker counts for the parallel scenario")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="seconds added to every RPC call")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint case")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions per stats measurement")
+    parser.add_argument("--output", help="write the result document to this file")
+    parser.add_argument("--compare", help="print changes against an earlier result document")
+    parser.add_argument("--worker", choices=["backfill", "stats"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker = worker_backfill if args.worker == "backfill" else worker_stats
+        print(json.dumps(worker(args)))
+        return
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    results = {}
+    if "backfill" in scenarios:
+        results["backfill"] = scenario_backfill(args, workdir)
+    if "parallel" in scenarios:
+        for name, result in scenario_parallel(args, workdir).items():
+            results[f"parallel.{name}"] = result
+
+    if "endpoints" in scenarios or "stats" in scenarios:
+        database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'seeded.db')}"
+        results["seed"] = seed_database(database_url, args)
+        if "stats" in scenarios:
+            results["stats"] = scenario_stats(args, database_url)
+        if "endpoints" in scenarios:
+            for name, result in scenario_endpoints(args, database_url).items():
+                results[f"endpoint.{name}"] = result
+
+    document = result_document("api", {key: value for key, value in vars(args).items()
+                                       if key not in ("output", "compare", "worker")}, results)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(document, handle, indent=2)
+    print(json.dumps(document, indent=2))
+
+    if args.compare:
+        print("\n".join(compare(load_json(args.compare), document)))
+
+
+if __name__ == "__main__":
+    main()
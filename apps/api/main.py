@@ -5,26 +5,110 @@ FastAPI backend for NFT minting dApp on IRYS Testnet
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+import asyncio
+import logging
 import os
 from contextlib import asynccontextmanager
+from anyio import to_thread
 
+from app.core.encoding import CompressionMiddleware
+from app.core.executor import run_blocking, shutdown_executor
+from app.core.metrics import MetricsMiddleware, monitor_event_loop, render_metrics
 from app.database import init_db
 from app.routers import nft, events, health
-from app.services.blockchain import BlockchainService
+from app.services.blockchain import app_blockchain_service
+from app.services.event_stream import EventHub
+from app.services.leader import LeaderElection
 from app.core.config import settings
 
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
-    await init_db()
-    blockchain_service = BlockchainService()
-    await blockchain_service.start_event_listener()
+    # Synchronous routes run on this bounded pool instead of the event loop
+    to_thread.current_default_thread_limiter().total_tokens = settings.API_THREADPOOL_SIZE
+    loop_monitor = asyncio.create_task(monitor_event_loop())
+    event_hub = EventHub()
+    await event_hub.start()
+    app.state.event_hub = event_hub
+    # Created on first use or by warm_up, so a slow RPC endpoint never delays boot
+    app.state.blockchain_service = None
+    app.state.ready = False
+    app.state.startup_error = None
+    
+    # Pollers that write to the database run in the elected process only
+    background = {}
+    
+    async def start_background():
+        # Imported here: httpx and the resolver are only needed in the elected process
+        from app.services.metadata_resolver import MetadataResolver
+        
+        await app.state.blockchain_service.start_event_listener()
+        if settings.METADATA_RESOLVER_ENABLED:
+            background["metadata_resolver"] = MetadataResolver()
+            await background["metadata_resolver"].start()
+    
+    async def stop_background():
+        if "metadata_resolver" in background:
+            await background.pop("metadata_resolver").stop()
+        await app.state.blockchain_service.stop_event_listener()
+    
+    async def start_work():
+        await run_blocking(app_blockchain_service, app)
+        if settings.LEADER_ELECTION_ENABLED:
+            background["election"] = LeaderElection("indexer", start_background, stop_background)
+            await background["election"].start()
+            return
+        try:
+            await start_background()
+        except Exception:
+            # Undo a partial start so the retry begins from scratch
+            try:
+                await stop_background()
+            except Exception as e:
+                print(f"Error stopping background work: {e}")
+            raise
+        background["started"] = True
+    
+    async def retry(stage: str, step):
+        """Run a startup step until it succeeds, recording the last failure for /ready"""
+        while True:
+            try:
+                await step()
+                return
+            except Exception as e:
+                app.state.startup_error = f"{stage}: {e}"
+                print(f"Startup step {stage} failed, retrying in {settings.STARTUP_RETRY_INTERVAL}s: {e}")
+                await asyncio.sleep(settings.STARTUP_RETRY_INTERVAL)
+    
+    async def warm_up():
+        """Prepare the database, RPC client and pollers while requests are already being served"""
+        await retry("database", lambda: init_db(migrate=settings.DATABASE_MIGRATE_ON_STARTUP))
+        await retry("background", start_work)
+        app.state.startup_error = None
+        app.state.ready = True
+    
+    startup = asyncio.create_task(warm_up())
     yield
     # Shutdown
-    await blockchain_service.stop_event_listener()
+    startup.cancel()
+    try:
+        await startup
+    except asyncio.CancelledError:
+        pass
+    if "election" in background:
+        await background["election"].stop()
+    elif background.pop("started", False):
+        await stop_background()
+    if app.state.blockchain_service:
+        app.state.blockchain_service.close()
+    await event_hub.stop()
+    loop_monitor.cancel()
+    shutdown_executor()
 
 
 # Create FastAPI app
@@ -32,7 +116,8 @@ app = FastAPI(
     title="Eternal Calendar NFT API",
     description="Backend API for NFT minting dApp on IRYS Testnet",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -44,6 +129,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip for large responses the response cache has not compressed already
+app.add_middleware(CompressionMiddleware)
+
+# Route latency histograms, outermost so they include the CORS layer
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health.router, prefix="/api/health", tags=["health"])
 app.include_router(nft.router, prefix="/api/nft", tags=["nft"])
@@ -61,6 +152,13 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""